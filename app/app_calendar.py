@@ -0,0 +1,311 @@
+import os
+import json
+import struct
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timedelta
+
+import requests
+
+from app_http import get_http, DOWNLOADED
+
+WEEK_MAP = {'日': 0, '一': 1, '二': 2, '三': 3, '四': 4, '五': 5, '六': 6}
+WEEK_NAMES = '一二三四五六日'     # date.weekday() 0 = 週一
+CALENDAR_URL = 'https://cdn.jsdelivr.net/gh/ruyut/TaiwanCalendar/data/{year}.json'
+
+
+def week_id_of(entry):
+    """依原本的週次規則計算週別代碼，例如 '643' (年尾碼 + 週數)"""
+    d = entry['date']; y, m, day = int(d[:4]), int(d[4:6]), int(d[6:])
+    code = y % 10
+    wd = WEEK_MAP[entry['week']]
+    wn = 1 if (m == 1 and day <= 6) else ((m - 1) * 31 + day - 1) // 7 + 1
+    if m == 12 and day == 31 and wd != 5:
+        code = (y + 1) % 10; wn = 1
+    return f"{code}{wn:02d}"
+
+
+# ---------- 工作日索引 ----------
+class WorkdayCalendar:
+    """由 {year}_modify.json 資料一次建立的索引：日期 → 序號、工作日前綴和、日期 → 週別。
+    區間查詢以前綴和相減，日期 (字串 'YYYYMMDD') 比較語意與原本逐筆掃描相同。"""
+
+    def __init__(self, annual_data):
+        entries = sorted(annual_data, key=lambda e: e['date'])
+        self.dates = [e['date'] for e in entries]
+        self.ordinal = {d: i for i, d in enumerate(self.dates)}
+        self.holiday = [bool(e['isHoliday']) for e in entries]
+        # 整數日期 (YYYYMMDD)，供精簡 task record 以整數比較與查詢
+        self.int_dates = array('l', (int(d) for d in self.dates))
+        self.prefix = [0] * (len(entries) + 1)
+        for i, is_holiday in enumerate(self.holiday):
+            self.prefix[i + 1] = self.prefix[i] + (0 if is_holiday else 1)
+
+        self.date_to_week = {}
+        self.week_bounds = {}
+        self.week_order = []
+        for i, entry in enumerate(entries):
+            wid = week_id_of(entry)
+            self.date_to_week[entry['date']] = wid
+            if wid not in self.week_bounds:
+                self.week_order.append(wid)
+            lo, hi = self.week_bounds.get(wid, (i, i))
+            self.week_bounds[wid] = (min(lo, i), max(hi, i))
+        self.week_index = {wid: i for i, wid in enumerate(self.week_order)}
+        # 日期範圍 + 假日旗標；假日資料變更時不同，供結果快取判斷是否失效
+        self.signature = (self.dates[0] if self.dates else None, self.dates[-1] if self.dates else None,
+                          len(self.dates), hash(bytes(self.holiday)))
+
+    def __len__(self):
+        return len(self.dates)
+
+    def _lower(self, start):
+        i = self.ordinal.get(start)
+        return i if i is not None else bisect_left(self.dates, start)
+
+    def _upper(self, end):
+        i = self.ordinal.get(end)
+        return i + 1 if i is not None else bisect_right(self.dates, end)
+
+    def workdays_between(self, start, end):
+        """[start, end] 之間 (含) 的工作日數"""
+        lo, hi = self._lower(start), self._upper(end)
+        return self.prefix[hi] - self.prefix[lo] if hi > lo else 0
+
+    def index_range(self, start, end):
+        """[start, end] 在 dates 中的序號範圍 [lo, hi)"""
+        lo, hi = self._lower(start), self._upper(end)
+        return lo, max(lo, hi)
+
+    def workdays_between_ord(self, start, end):
+        """同 workdays_between，start/end 為整數日期"""
+        lo, hi = bisect_left(self.int_dates, start), bisect_right(self.int_dates, end)
+        return self.prefix[hi] - self.prefix[lo] if hi > lo else 0
+
+    def week_of(self, date):
+        return self.date_to_week.get(date)
+
+    def weeks_from(self, wid, count):
+        """從 wid 起依日曆順序的 count 個週別 (可跨年)"""
+        i = self.week_index[wid]
+        return self.week_order[i:i + count]
+
+    def week_range(self, wid):
+        """週別的 (起始日, 結束日)；不在索引內時回傳 None"""
+        bounds = self.week_bounds.get(wid)
+        if bounds is None:
+            return None
+        return self.dates[bounds[0]], self.dates[bounds[1]]
+
+    def week_workdays(self, wid):
+        lo, hi = self.week_bounds[wid]
+        return self.prefix[hi + 1] - self.prefix[lo]
+
+    def workdays_in_week(self, start, end, wid):
+        """[start, end] 與週別 wid 交集的工作日數"""
+        week_start, week_end = self.week_range(wid)
+        return self.workdays_between(max(start, week_start), min(end, week_end))
+
+
+def as_calendar(annual_data):
+    """年度資料 list 或已建立的 WorkdayCalendar 一律轉為 WorkdayCalendar"""
+    return annual_data if isinstance(annual_data, WorkdayCalendar) else WorkdayCalendar(annual_data)
+
+
+# ---------- 假日規則 (套用層，不改寫檔案) ----------
+# 規則或快取格式變更時遞增，舊快取會自動失效
+CACHE_VERSION = 1
+CACHE_MAGIC = b'MPCL'
+CACHE_HEADER = struct.Struct('<4sHHIqq')    # magic, version, year, 天數, 來源檔大小, 來源檔 mtime_ns
+FLAG_HOLIDAY = 1        # 套用規則後的假日
+FLAG_RAW_HOLIDAY = 2    # 原始資料的假日
+
+
+def apply_rules(entry):
+    """勞動節 (5/1) 與六、日強制為假日"""
+    return bool(entry['isHoliday']) or entry['date'][4:] == '0501' or entry['week'] in ('六', '日')
+
+
+class CalendarService:
+    """多年度假日資料服務：已載入的年度在 cache_max_age 內直接沿用，之後重新確認來源檔
+    (條件式下載)，檔案大小/mtime 變更時才重新載入；daemon 與 GUI 不需重啟即可取得更新的假日資料。
+    處理後的結果存成精簡二進位快取 ({year}.calcache)，來源檔未變更時不連網、不寫檔"""
+
+    def __init__(self, data_dir='.', http=None):
+        self.data_dir = data_dir
+        self._http = http       # None：使用 app_http 的共用連線層
+        self._years = {}        # 年度 -> (entries, 來源檔 stamp, 確認時間)
+        self._missing = set()   # 本次更新已確認取不到的年度，不重複連網；retry_missing() 後重試
+        self._calendars = {}
+        self._lock = threading.Lock()
+
+    def _json_path(self, year):
+        return os.path.join(self.data_dir, f"{year}.json")
+
+    def _cache_path(self, year):
+        return os.path.join(self.data_dir, f"{year}.calcache")
+
+    def _stamp(self, year):
+        """來源檔 (沒有時為二進位快取) 的 (大小, mtime_ns)"""
+        for path in (self._json_path(year), self._cache_path(year)):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            return path, st.st_size, st.st_mtime_ns
+        return None
+
+    def _max_age(self):
+        return (self._http or get_http()).cache_max_age
+
+    def retry_missing(self):
+        """新的一次更新開始：先前取不到的年度 (例如尚未發布的下一年度) 重新嘗試"""
+        with self._lock:
+            self._missing.clear()
+
+    # 原始年度資料：條件式下載，未變更時只有 304；離線模式或連線失敗時使用本地檔
+    def download_year(self, year, force=False):
+        http = self._http or get_http()
+        url = CALENDAR_URL.format(year=year)
+        status = http.get_cached(url, self._json_path(year), force=force)
+        if status == DOWNLOADED:
+            print(f"從網路下載: {url}")
+        return status is not None
+
+    def _read_cache(self, year, source_stat):
+        try:
+            with open(self._cache_path(year), 'rb') as f:
+                blob = f.read()
+        except OSError:
+            return None
+        if len(blob) < CACHE_HEADER.size:
+            return None
+        magic, version, cached_year, count, size, mtime_ns = CACHE_HEADER.unpack_from(blob)
+        if magic != CACHE_MAGIC or version != CACHE_VERSION or cached_year != year:
+            return None
+        # 來源檔存在且已變更 → 重建；來源檔不存在時直接採用快取
+        if source_stat is not None and (source_stat.st_size, source_stat.st_mtime_ns) != (size, mtime_ns):
+            return None
+        offsets = array('H')
+        offsets.frombytes(blob[CACHE_HEADER.size:CACHE_HEADER.size + 2 * count])
+        flags = blob[CACHE_HEADER.size + 2 * count:CACHE_HEADER.size + 3 * count]
+        if len(offsets) != count or len(flags) != count:
+            return None
+        return offsets, flags
+
+    def _write_cache(self, year, offsets, flags, source_stat):
+        header = CACHE_HEADER.pack(CACHE_MAGIC, CACHE_VERSION, year, len(offsets),
+                                   source_stat.st_size, source_stat.st_mtime_ns)
+        tmp = self._cache_path(year) + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(header + offsets.tobytes() + bytes(flags))
+        os.replace(tmp, self._cache_path(year))
+
+    def _fetch_year(self, year, force=False):
+        # 已有來源檔時定期確認 CDN 是否更新；只有二進位快取 (來源檔已刪除) 時沿用快取不連網
+        if force or os.path.exists(self._json_path(year)) or not os.path.exists(self._cache_path(year)):
+            return self.download_year(year, force)
+        return True
+
+    def _load_year(self, year):
+        json_path = self._json_path(year)
+        source_stat = os.stat(json_path) if os.path.exists(json_path) else None
+        cached = self._read_cache(year, source_stat)
+        if cached is None:
+            if source_stat is None:
+                return None
+            with open(json_path, 'r', encoding='utf-8') as f:
+                raw = json.load(f)
+            first = date(year, 1, 1)
+            offsets = array('H')
+            flags = bytearray()
+            for entry in raw:
+                d = entry['date']
+                offsets.append((date(int(d[:4]), int(d[4:6]), int(d[6:])) - first).days)
+                flags.append((FLAG_HOLIDAY if apply_rules(entry) else 0) |
+                             (FLAG_RAW_HOLIDAY if entry['isHoliday'] else 0))
+            self._write_cache(year, offsets, flags, source_stat)
+            cached = offsets, bytes(flags)
+
+        offsets, flags = cached
+        first = date(year, 1, 1)
+        entries = []
+        for offset, flag in zip(offsets, flags):
+            d = first + timedelta(days=offset)
+            entries.append({'date': d.strftime('%Y%m%d'), 'week': WEEK_NAMES[d.weekday()],
+                            'isHoliday': bool(flag & FLAG_HOLIDAY)})
+        return entries
+
+    def year_entries(self, year, download=True, force=False):
+        """套用假日規則後的年度資料；無法取得時回傳 None。force=True 時不論期限重新下載"""
+        with self._lock:
+            cached = self._years.get(year)
+            now = time.time()
+            if not force and cached is not None and now - cached[2] < self._max_age():
+                return cached[0]
+            if not force and cached is None and year in self._missing:
+                return None
+            if download and not self._fetch_year(year, force) and cached is None:
+                self._missing.add(year)
+                return None
+            stamp = self._stamp(year)
+            if cached is not None and (stamp is None or stamp == cached[1]):
+                # 來源檔未變更 (或已無法取得)：沿用已載入的資料
+                self._years[year] = (cached[0], cached[1], now)
+                return cached[0]
+            entries = self._load_year(year)
+            if entries is None:
+                if cached is not None:
+                    return cached[0]
+                self._missing.add(year)
+                return None
+            if cached is not None:
+                # 假日資料已更新，合併的日曆重建
+                self._calendars.clear()
+            self._years[year] = (entries, stamp, now)
+            return entries
+
+    def calendar(self, years, required=None):
+        """合併多個年度的 WorkdayCalendar；required 內的年度缺少時拋出 FileNotFoundError"""
+        required = set(required if required is not None else years)
+        loaded = []
+        for year in sorted(set(years)):
+            try:
+                entries = self.year_entries(year)
+            except requests.RequestException as e:
+                if year in required:
+                    raise
+                print(f"下載失敗: {year} ({e})")
+                with self._lock:
+                    self._missing.add(year)
+                entries = None
+            if entries is None:
+                if year in required:
+                    raise FileNotFoundError(f"無法取得 {year} 年假日資料")
+                continue
+            loaded.append(year)
+        key = tuple(loaded)
+        with self._lock:
+            if key not in self._calendars:
+                self._calendars[key] = WorkdayCalendar([e for y in key for e in self._years[y][0]])
+            return self._calendars[key]
+
+    def calendar_for(self, today=None, horizon_weeks=3, extra_years=()):
+        """涵蓋本年度與規劃區間的日曆；前一年度 (跨年 issue 的工作日) 與規劃區間跨入的下一年度為相鄰年度，有資料才載入。
+        extra_years：另外需要的年度 (例如查詢區間或子項目跨越的年度)，同樣有資料才載入"""
+        today = today or datetime.now()
+        horizon_end = today + timedelta(weeks=horizon_weeks + 1)
+        years = set(range(today.year - 1, horizon_end.year + 1)) | set(extra_years)
+        return self.calendar(years, required=[today.year])
+
+
+_service = None
+
+
+def get_calendar_service():
+    global _service
+    if _service is None:
+        _service = CalendarService()
+    return _service
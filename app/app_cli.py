@@ -0,0 +1,171 @@
+"""ManPower 命令列 (不需 GUI)
+
+    python app_cli.py [--config ManPowerTool.ini] [--offline] refresh [--engine loop|numpy|incremental]
+    python app_cli.py daemon [--interval 900]
+    python app_cli.py status
+    python app_cli.py calendar [--force]
+    python app_cli.py load [--start 20250101 --end 20250331] [--department MP]
+    python app_cli.py trend --week 542 [--member 王小明] [--department MP] [--days 60]
+
+refresh/daemon 成功後寫入版本化快照 (snapshot_dir)，GUI 開啟時直接讀取最新快照。
+--offline 不連網，以本地 tasks 與假日資料重新計算。
+"""
+import argparse
+import sys
+import time
+from datetime import datetime, timedelta
+
+from app_snapshot import latest_info, snapshot_age, format_age
+
+
+def refresh_once(engine=None):
+    """執行一次完整更新並寫入快照；失敗時拋出例外，不改動既有快照"""
+    import app_init
+    started = time.perf_counter()
+    if not app_init.OFFLINE:
+        check_jira(app_init.connect_jira())
+    result = app_init.main(engine=engine)
+    if result is None:
+        raise RuntimeError("未產生結果")
+    return app_init.save_snapshot(result, engine, round(time.perf_counter() - started, 2))
+
+
+def check_jira(jira):
+    """client 建立時不發請求 (get_server_info=False)，以 server_info() 實際連線一次；無法連線時立即失敗"""
+    if jira is None:
+        raise RuntimeError("JIRA 連線失敗")
+    try:
+        jira.server_info()
+    except Exception as e:
+        raise RuntimeError(f"JIRA 連線失敗：{e}") from e
+
+
+def run_daemon(interval, retry, engine=None):
+    """依固定間隔更新；失敗時保留上一版快照，並以較短間隔重試"""
+    print(f"⏰ daemon 啟動：每 {interval} 秒更新一次")
+    while True:
+        started = time.monotonic()
+        try:
+            refresh_once(engine)
+            wait = interval
+        except Exception as e:
+            print(f"❌ 更新失敗，保留上一版快照：{e}")
+            wait = min(interval, retry)
+        time.sleep(max(0.0, wait - (time.monotonic() - started)))
+
+
+def show_status(directory):
+    info = latest_info(directory)
+    if info is None:
+        print(f"尚無快照 ({directory})")
+        return 1
+    print(f"最新快照：{info['file']}")
+    print(f"產生時間：{info['created']} ({format_age(snapshot_age(info))})")
+    for key in ('project_keys', 'engine', 'duration'):
+        if key in info:
+            print(f"{key}：{info[key]}")
+    return 0
+
+
+def show_daily_load(start=None, end=None, department=None):
+    """列出每日負載超過上限的人員 (依首次超載日排序)"""
+    import app_init
+    load = app_init.query_daily_load(start, end, department)
+    if load is None:
+        print("日曆資料不足，無法計算每日負載")
+        return 1
+    print(f"每日負載 {load['start_date']} ~ {load['end_date']}，{len(load['dates'])} 個工作日，上限 {load['limit_hours']} 小時")
+    over = sorted((m for m in load['members'] if m['overload_days']), key=lambda m: (m['first_overload'], m['name']))
+    for m in over:
+        print(f"  {m['name']:<20} 首次超載 {m['first_overload']}  超載 {m['overload_days']} 天  "
+              f"峰值 {m['peak_hours']}h ({m['peak_date']})")
+    print(f"共 {len(over)} / {len(load['members'])} 人超載")
+    return 0
+
+
+def show_trend(path, week_id, member=None, department=None, days=None):
+    """列出週別 week_id 的規劃工時在每次更新時的變化 (人員或整個部門)"""
+    from app_history import HistoryStore, ALL_DEPARTMENTS
+    since = datetime.now() - timedelta(days=days) if days else None
+    with HistoryStore(path) as history:
+        if member:
+            trend = history.member_trend(member, week_id, department or ALL_DEPARTMENTS, since)
+        else:
+            trend = history.team_trend(week_id, department or ALL_DEPARTMENTS, since)
+    if not trend:
+        print("尚無歷史資料")
+        return 1
+    print(f"週別 {week_id}：{member or department or '整個部門'}")
+    previous = None
+    for taken, hours in trend:
+        delta = '' if previous is None or hours == previous else f"{hours - previous:+.1f}"
+        print(f"  {taken.replace('T', ' ')}  {hours:>8.1f}  {delta}")
+        previous = hours
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='app_cli', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--config', help='設定檔路徑 (預設 ./ManPowerTool.ini)')
+    parser.add_argument('--offline', action='store_true', default=None,
+                        help='離線模式：不連 JIRA 與日曆 CDN，使用本地資料 (覆寫設定檔的 offline)')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    refresh = sub.add_parser('refresh', help='執行一次更新並寫入快照')
+    refresh.add_argument('--engine', choices=['loop', 'numpy', 'incremental'])
+
+    daemon = sub.add_parser('daemon', help='定期更新並寫入快照')
+    daemon.add_argument('--engine', choices=['loop', 'numpy', 'incremental'])
+    daemon.add_argument('--interval', type=int, help='更新間隔秒數 (預設 daemon_interval 或 900)')
+    daemon.add_argument('--retry', type=int, help='失敗後重試秒數 (預設 daemon_retry 或 300)')
+
+    sub.add_parser('status', help='顯示最新快照與資料時間')
+    calendar = sub.add_parser('calendar', help='下載/確認今年 (12 月時含明年) 的假日資料')
+    calendar.add_argument('--force', action='store_true', help='不論檢查期限或下載紀錄，重新下載')
+
+    load = sub.add_parser('load', help='每日負載：列出單日超過 8 小時的人員')
+    load.add_argument('--start', help='起始日 YYYYMMDD (預設本週起的規劃週)')
+    load.add_argument('--end', help='結束日 YYYYMMDD')
+    load.add_argument('--department', help='部門 (project key)；預設全部部門')
+
+    trend = sub.add_parser('trend', help='週工時歷史：某週別規劃工時在每次更新時的變化')
+    trend.add_argument('--week', required=True, help='週別，例如 542')
+    trend.add_argument('--member', help='人員；未指定時為整個部門總計')
+    trend.add_argument('--department', help='部門 (project key)；預設單一部門或跨部門合併結果')
+    trend.add_argument('--days', type=int, help='只列出最近幾天')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    import app_init
+    config = app_init.configure(args.config, args.offline)
+    section = config['JIRA']
+
+    if args.command == 'refresh':
+        refresh_once(args.engine)
+    elif args.command == 'daemon':
+        interval = args.interval or section.getint('daemon_interval', 900)
+        retry = args.retry or section.getint('daemon_retry', 300)
+        try:
+            run_daemon(interval, retry, args.engine)
+        except KeyboardInterrupt:
+            print("👋 daemon 結束")
+    elif args.command == 'status':
+        return show_status(app_init.SNAPSHOT_DIR)
+    elif args.command == 'calendar':
+        import app_day_data_init
+        app_day_data_init.main(force=args.force)
+    elif args.command == 'load':
+        return show_daily_load(args.start, args.end, args.department)
+    elif args.command == 'trend':
+        if not app_init.HISTORY_DB:
+            print("history_path 未設定，未記錄工時歷史")
+            return 1
+        return show_trend(app_init.HISTORY_DB, args.week, args.member, args.department, args.days)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
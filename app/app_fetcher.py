@@ -0,0 +1,158 @@
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import requests
+from jira.exceptions import JIRAError
+
+import app_metrics
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class RefreshCancelled(Exception):
+    """使用者取消更新"""
+
+
+# ---------- 分頁抓取 (有上限的並行 + 重試) ----------
+class PageFetcher:
+    """每一頁只下載一次；以固定數量的 worker 並行抓取，依 startAt 順序回傳"""
+
+    def __init__(self, jira, page_size=100, concurrency=5, max_retries=5, backoff=1.0, max_backoff=30.0,
+                 cancel_event=None, raw_json=True):
+        self.jira = jira
+        # raw_json: 每頁直接回傳 issue JSON dict，不建立 jira.Issue 物件
+        self.raw_json = raw_json
+        self.cancel_event = cancel_event
+        self.page_size = max(1, int(page_size))
+        self.concurrency = max(1, int(concurrency))
+        self.max_retries = max(0, int(max_retries))
+        self.backoff = float(backoff)
+        self.max_backoff = float(max_backoff)
+
+    @classmethod
+    def from_config(cls, jira, section, cancel_event=None):
+        return cls(
+            jira,
+            page_size=section.get('batch_size', '100'),
+            concurrency=section.get('concurrency', '5'),
+            max_retries=section.get('max_retries', '5'),
+            backoff=section.get('retry_backoff', '1.0'),
+            cancel_event=cancel_event,
+            raw_json=section.getboolean('raw_json', True),
+        )
+
+    def cancelled(self):
+        return self.cancel_event is not None and self.cancel_event.is_set()
+
+    def _check_cancel(self):
+        if self.cancelled():
+            raise RefreshCancelled()
+
+    def _search(self, jql, start_at, fields):
+        """回傳 (該頁 issue list, 總筆數, 伺服器實際採用的 maxResults)"""
+        attempt = 0
+        while True:
+            self._check_cancel()
+            start = time.perf_counter()
+            try:
+                page = self.jira.search_issues(jql, startAt=start_at, maxResults=self.page_size, fields=fields,
+                                               json_result=self.raw_json)
+                # 含 HTTP 往返與 JSON 解析 (非 raw_json 時另含 jira.Issue 物件建立)
+                app_metrics.observe('jira.page_seconds', time.perf_counter() - start)
+                app_metrics.count('jira.requests')
+                if self.raw_json:
+                    return page.get('issues', []), page.get('total', 0), page.get('maxResults')
+                return list(page), page.total, getattr(page, 'maxResults', None)
+            except (JIRAError, requests.ConnectionError, requests.Timeout) as e:
+                app_metrics.count('jira.errors')
+                status = getattr(e, 'status_code', None)
+                retryable = status in RETRY_STATUS or not isinstance(e, JIRAError)
+                if not retryable or attempt >= self.max_retries:
+                    raise
+                delay = self._delay(attempt, e)
+                if self.cancel_event is not None:
+                    self.cancel_event.wait(delay)
+                else:
+                    time.sleep(delay)
+                app_metrics.count('jira.retries')
+                attempt += 1
+
+    def _delay(self, attempt, error):
+        # 優先採用伺服器的 Retry-After，否則指數退避 + full jitter
+        response = getattr(error, 'response', None)
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), self.max_backoff)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+
+    def iter_pages(self, jql, fields, progress_callback=None):
+        """依序產生 (start_at, issues)；progress_callback(已下載筆數, 總筆數) 於每頁完成時回報"""
+        if isinstance(fields, (list, tuple)):
+            fields = ",".join(fields)
+
+        # 第一頁同時取得總筆數，不另外發 count 查詢
+        first, total, max_results = self._search(jql, 0, fields)
+        step = self._step(first, total, max_results)
+        done = len(first)
+        if progress_callback is not None:
+            progress_callback(min(done, total), total)
+        yield 0, first
+
+        starts = list(range(step, total, step))
+        if not starts:
+            return
+
+        ready = {}
+        next_start = step
+        executor = ThreadPoolExecutor(self.concurrency)
+        try:
+            futures = {executor.submit(self._search, jql, s, fields): s for s in starts}
+            pending = set(futures)
+            while pending:
+                # 定期醒來檢查取消，不必等到下一頁完成
+                finished, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+                self._check_cancel()
+                for future in finished:
+                    page = future.result()[0]
+                    ready[futures[future]] = page
+                    done += len(page)
+                    if progress_callback is not None:
+                        progress_callback(min(done, total), total)
+                while next_start in ready:
+                    page = ready.pop(next_start)
+                    # 伺服器該頁回傳較少筆 (例如上限在抓取中途變小)：補抓缺口，不遺漏 issue
+                    stop = min(next_start + step, total)
+                    while page and next_start + len(page) < stop:
+                        more = self._search(jql, next_start + len(page), fields)[0]
+                        if not more:
+                            break
+                        page.extend(more)
+                        done += len(more)
+                        if progress_callback is not None:
+                            progress_callback(min(done, total), total)
+                    yield next_start, page
+                    next_start += step
+        finally:
+            # 取消尚未開始的頁面；進行中的請求在背景結束，不阻塞呼叫端
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _step(self, first, total, max_results):
+        """後續頁的 startAt 間距：batch_size 超過伺服器上限時以伺服器實際回傳的頁大小為準"""
+        step = self.page_size
+        if max_results:
+            step = min(step, int(max_results))
+        if first and len(first) < min(step, total):
+            step = len(first)
+        if step < self.page_size:
+            print(f"⚠️ batch_size {self.page_size} 超過伺服器單頁上限，改以每頁 {step} 筆抓取")
+        return max(1, step)
+
+    def fetch_all(self, jql, fields, progress_callback=None):
+        issues = []
+        for _, page in self.iter_pages(jql, fields, progress_callback):
+            issues.extend(page)
+        return issues
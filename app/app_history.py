@@ -0,0 +1,174 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+HISTORY_PATH = './workhour_history.db'
+FULL_DAYS = 14          # 近期保留每次更新
+KEEP_DAYS = 365         # 更早的每天只保留最後一次，超過此天數刪除
+TIME_FORMAT = '%Y-%m-%dT%H:%M:%S'
+ALL_DEPARTMENTS = ''    # 單一部門或跨部門合併結果
+
+
+# ---------- 工時歷史 (SQLite 時間序列) ----------
+# 每次更新記錄一筆 snapshots；series 只在 (部門, 週別, 人員) 的工時與上一次不同時新增一點，
+# 某時間點的值為該時間 (含) 之前最後一點，人員從結果中消失時記為 0。
+class HistoryStore:
+    """依部門、週別、人員與更新時間索引的週工時歷史；查詢只讀索引，不重算"""
+
+    def __init__(self, path=HISTORY_PATH):
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS snapshots (
+                taken TEXT PRIMARY KEY
+            );
+            CREATE TABLE IF NOT EXISTS series (
+                department TEXT NOT NULL,
+                week_id TEXT NOT NULL,
+                member TEXT NOT NULL,
+                taken TEXT NOT NULL,
+                hours REAL NOT NULL,
+                PRIMARY KEY (department, week_id, member, taken)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_series_taken ON series(taken);
+        ''')
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # 寫入一次更新結果 (departments: 部門 -> 結果；合併結果的部門為 ALL_DEPARTMENTS)
+    def append(self, departments, taken=None):
+        taken = (taken or datetime.now()).strftime(TIME_FORMAT)
+        rows = []
+        for department, result in departments.items():
+            rows.extend(self._changed_points(department, result, taken))
+        with self.conn:
+            self.conn.execute('INSERT OR IGNORE INTO snapshots (taken) VALUES (?)', (taken,))
+            self.conn.executemany('INSERT OR REPLACE INTO series VALUES (?, ?, ?, ?, ?)', rows)
+        return len(rows)
+
+    def _changed_points(self, department, result, taken):
+        week_ids = [w['wh_week_id'] for w in result['week']]
+        current = {}
+        for member in result['members']:
+            for k, wid in enumerate(week_ids):
+                current[(wid, member['name'])] = member.get(f'week_{k+1}_hours', 0)
+        last = self._latest(department, week_ids)
+        rows = [(department, wid, name, taken, hours) for (wid, name), hours in current.items()
+                if last.get((wid, name), 0) != hours]
+        rows += [(department, wid, name, taken, 0) for (wid, name), hours in last.items()
+                 if hours and (wid, name) not in current]
+        return rows
+
+    def _latest(self, department, week_ids):
+        """各 (週別, 人員) 的最新值"""
+        latest = {}
+        for wid in week_ids:
+            cur = self.conn.execute('''
+                SELECT member, hours FROM series s
+                WHERE department = ? AND week_id = ? AND taken = (
+                    SELECT MAX(taken) FROM series
+                    WHERE department = s.department AND week_id = s.week_id AND member = s.member)
+            ''', (department, wid))
+            for member, hours in cur:
+                latest[(wid, member)] = hours
+        return latest
+
+    # 查詢
+    def snapshot_times(self, since=None):
+        cur = self.conn.execute('SELECT taken FROM snapshots WHERE taken >= ? ORDER BY taken',
+                                (_since(since),))
+        return [r[0] for r in cur]
+
+    def week_ids(self, department=ALL_DEPARTMENTS):
+        cur = self.conn.execute('SELECT DISTINCT week_id FROM series WHERE department = ? ORDER BY week_id',
+                                (department,))
+        return [r[0] for r in cur]
+
+    def members(self, department=ALL_DEPARTMENTS, week_id=None):
+        if week_id is None:
+            cur = self.conn.execute('SELECT DISTINCT member FROM series WHERE department = ? ORDER BY member',
+                                    (department,))
+        else:
+            cur = self.conn.execute('SELECT DISTINCT member FROM series WHERE department = ? AND week_id = ? '
+                                    'ORDER BY member', (department, week_id))
+        return [r[0] for r in cur]
+
+    def member_trend(self, member, week_id, department=ALL_DEPARTMENTS, since=None):
+        """[(更新時間, 工時)]：since 之後每次更新時該人員在 week_id 的規劃工時"""
+        cur = self.conn.execute('SELECT taken, member, hours FROM series WHERE department = ? AND week_id = ? '
+                                'AND member = ? ORDER BY taken', (department, week_id, member))
+        return self._trend(cur, since)
+
+    def team_trend(self, week_id, department=ALL_DEPARTMENTS, since=None):
+        """[(更新時間, 部門總工時)]"""
+        cur = self.conn.execute('SELECT taken, member, hours FROM series WHERE department = ? AND week_id = ? '
+                                'ORDER BY taken', (department, week_id))
+        return self._trend(cur, since)
+
+    def _trend(self, points, since):
+        # 依時間掃描變更點，在每次更新時間取目前總和
+        values = {}
+        total = 0.0
+        trend = []
+        points = iter(points)
+        pending = next(points, None)
+        for taken in self.snapshot_times(since):
+            while pending is not None and pending[0] <= taken:
+                _, member, hours = pending
+                total += hours - values.get(member, 0)
+                values[member] = hours
+                pending = next(points, None)
+            trend.append((taken, round(total, 1) + 0.0))
+        return trend
+
+    # 保留與降採樣
+    def compact(self, full_days=FULL_DAYS, keep_days=KEEP_DAYS, now=None):
+        """超過 full_days 的更新每天只保留最後一次；超過 keep_days 的刪除。回傳刪除的更新次數"""
+        now = now or datetime.now()
+        full_cut = (now - timedelta(days=full_days)).strftime(TIME_FORMAT)
+        expire_cut = (now - timedelta(days=keep_days)).strftime(TIME_FORMAT)
+        removed = 0
+        with self.conn:
+            # 過期：各序列在期限前的最後值移到第一個保留的時間點 (該時間點已有值時以較新的為準)
+            first = self.conn.execute('SELECT MIN(taken) FROM snapshots WHERE taken >= ?', (expire_cut,)).fetchone()[0]
+            if first is not None:
+                self.conn.execute('''
+                    INSERT OR IGNORE INTO series
+                    SELECT department, week_id, member, ?, hours FROM series s
+                    WHERE taken < ? AND hours != 0 AND taken = (
+                        SELECT MAX(taken) FROM series
+                        WHERE department = s.department AND week_id = s.week_id AND member = s.member AND taken < ?)
+                ''', (first, expire_cut, expire_cut))
+            self.conn.execute('DELETE FROM series WHERE taken < ?', (expire_cut,))
+            removed += self.conn.execute('DELETE FROM snapshots WHERE taken < ?', (expire_cut,)).rowcount
+
+            # 降採樣：同一天有多次更新時，各序列當天的最後一點移到當天最後一次更新
+            days = self.conn.execute('''
+                SELECT substr(taken, 1, 10), MIN(taken), MAX(taken) FROM snapshots
+                WHERE taken < ? GROUP BY substr(taken, 1, 10) HAVING COUNT(*) > 1
+            ''', (full_cut,)).fetchall()
+            for _, day_first, day_last in days:
+                latest = {}
+                for department, week_id, member, hours in self.conn.execute(
+                        'SELECT department, week_id, member, hours FROM series WHERE taken >= ? AND taken <= ? '
+                        'ORDER BY taken', (day_first, day_last)):
+                    latest[(department, week_id, member)] = hours
+                self.conn.execute('DELETE FROM series WHERE taken >= ? AND taken < ?', (day_first, day_last))
+                self.conn.executemany('INSERT OR REPLACE INTO series VALUES (?, ?, ?, ?, ?)',
+                                      [key + (day_last, hours) for key, hours in latest.items()])
+                removed += self.conn.execute('DELETE FROM snapshots WHERE taken >= ? AND taken < ?',
+                                             (day_first, day_last)).rowcount
+        return removed
+
+
+def _since(since):
+    if since is None:
+        return ''
+    return since.strftime(TIME_FORMAT) if isinstance(since, datetime) else since
@@ -0,0 +1,163 @@
+import json
+import os
+import threading
+import time
+from email.utils import formatdate
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_POOL_SIZE = 10
+CACHE_MAX_AGE_HOURS = 24
+ACCEPT_ENCODING = 'gzip, deflate'
+
+# get_cached 的結果
+DOWNLOADED = 'downloaded'       # 200：內容已更新 (或首次下載)
+NOT_MODIFIED = 'not_modified'   # 304：本地檔仍為最新
+CACHED = 'cached'               # 未連網 (檢查期限內、離線模式或連線失敗)，使用本地檔
+
+_http = None
+_http_config = None
+_lock = threading.Lock()
+
+
+class OfflineError(requests.ConnectionError):
+    """離線模式下需要連網的請求"""
+
+
+# ---------- 共用 HTTP 連線層 ----------
+class HttpClient:
+    """process 內共用的 keep-alive 連線池 (日曆 CDN 與 JIRA client 共用同一個 adapter)、預設 timeout 與 gzip；
+    get_cached 以 ETag / If-Modified-Since 條件式下載，內容未變更時只收到 304"""
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, pool_size=DEFAULT_POOL_SIZE, offline=False,
+                 cache_max_age=CACHE_MAX_AGE_HOURS * 3600):
+        self.timeout = timeout
+        self.offline = offline
+        self.cache_max_age = cache_max_age
+        self.adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session = requests.Session()
+        self.session.headers['Accept-Encoding'] = ACCEPT_ENCODING
+        self.mount(self.session)
+
+    def mount(self, session):
+        """其他 Session (例如 jira 套件建立的) 改用共用連線池與壓縮設定"""
+        session.mount('https://', self.adapter)
+        session.mount('http://', self.adapter)
+        session.headers['Accept-Encoding'] = ACCEPT_ENCODING
+
+    def get(self, url, **kwargs):
+        if self.offline:
+            raise OfflineError(f"離線模式：未連線 {url}")
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.get(url, **kwargs)
+
+    def get_cached(self, url, path, max_age=None, force=False):
+        """下載 url 至本地檔 path，回傳 DOWNLOADED / NOT_MODIFIED / CACHED；無本地檔且取不到時回傳 None。
+        本地檔在 max_age 秒 (預設 cache_max_age) 內檢查過、離線模式或連線失敗時直接使用本地檔；
+        沒有下載紀錄 (.http.json 的 ETag / Last-Modified) 的本地檔 (手動放置或其他工具產生) 不連網檢查，
+        force=True 時才重新下載"""
+        max_age = self.cache_max_age if max_age is None else max_age
+        exists = os.path.exists(path)
+        meta = _read_meta(path) if exists else {}
+        if exists and (self.offline or not force):
+            if self.offline or not (meta.get('etag') or meta.get('last_modified')):
+                return CACHED
+            if time.time() - meta.get('checked', 0) < max_age:
+                return CACHED
+        if self.offline:
+            print(f"離線模式：無本地資料 {path}")
+            return None
+
+        headers = {}
+        if meta.get('url') == url:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+        try:
+            response = self.get(url, headers=headers)
+        except requests.RequestException as e:
+            if not exists:
+                raise
+            print(f"連線失敗，使用本地資料 {path} ({e})")
+            return CACHED
+
+        if response.status_code == 304 and exists:
+            status = NOT_MODIFIED
+        elif response.status_code == 200:
+            status = DOWNLOADED
+            # 內容相同時不改寫，保留檔案 mtime (依 mtime 判斷的衍生快取仍有效)
+            if not exists or _read_bytes(path) != response.content:
+                tmp = f'{path}.{os.getpid()}.tmp'
+                with open(tmp, 'wb') as f:
+                    f.write(response.content)
+                os.replace(tmp, path)
+        else:
+            print(f"下載失敗: {url} ({response.status_code})")
+            return CACHED if exists else None
+        meta = {'url': url, 'etag': response.headers.get('ETag', meta.get('etag')),
+                'last_modified': response.headers.get('Last-Modified') or meta.get('last_modified')
+                or _http_date(path), 'checked': time.time()}
+        _write_meta(path, meta)
+        return status
+
+    def close(self):
+        self.session.close()
+
+
+def _meta_path(path):
+    return f'{path}.http.json'
+
+
+def _read_meta(path):
+    try:
+        with open(_meta_path(path), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_meta(path, meta):
+    try:
+        with open(_meta_path(path), 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+    except OSError as e:
+        print(f"⚠️ 無法寫入 {_meta_path(path)}：{e}")
+
+
+def _read_bytes(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def _http_date(path):
+    # 伺服器未提供 Last-Modified 時以本地檔時間作為 If-Modified-Since
+    return formatdate(os.path.getmtime(path), usegmt=True)
+
+
+def pool_size_for(section):
+    """JIRA 分頁並行數 × 同時抓取的部門數，至少 DEFAULT_POOL_SIZE"""
+    from app_jira_client import parse_project_keys
+    keys = parse_project_keys(section.get('project_key', ''))
+    projects = min(len(keys) or 1, section.getint('project_concurrency', 4))
+    return max(DEFAULT_POOL_SIZE, section.getint('concurrency', 5) * projects)
+
+
+def get_http():
+    """依 ManPowerTool.ini 建立的共用 HttpClient；設定重新讀取 (load_config(path)) 後重建"""
+    global _http, _http_config
+    from app_jira_client import load_config
+    config = load_config()
+    with _lock:
+        if _http is None or _http_config is not config:
+            section = config['JIRA'] if config.has_section('JIRA') else config['DEFAULT']
+            if _http is not None:
+                _http.close()
+            _http = HttpClient(timeout=section.getfloat('http_timeout', DEFAULT_TIMEOUT),
+                               pool_size=pool_size_for(section),
+                               offline=section.getboolean('offline', False),
+                               cache_max_age=section.getfloat('cache_max_age_hours', CACHE_MAX_AGE_HOURS) * 3600)
+            _http_config = config
+        return _http
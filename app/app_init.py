@@ -1,261 +1,736 @@
 import json
+import multiprocessing
 import os
-import requests
-import configparser
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait
+from contextlib import ExitStack
 from datetime import datetime, timedelta
-from collections import defaultdict
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from jira import JIRA
-from decimal import Decimal, ROUND_HALF_UP
-import dateutil.parser
+from functools import wraps
+from zoneinfo import ZoneInfo
+import app_metrics
+from app_store import IssueStore
+from app_jira_client import load_config, get_connection, parse_project_keys
+from app_fetcher import PageFetcher, RefreshCancelled
+from app_calendar import get_calendar_service
+from app_http import get_http
+from app_output import write_workhour_db, load_workhour_summary, workhour_paths, WORKHOUR_DB, WORKHOUR_JSON
+from app_tasks import iter_json_array, iter_records
+from app_history import HistoryStore, ALL_DEPARTMENTS, HISTORY_PATH, FULL_DAYS, KEEP_DAYS
+from app_scenario import Scenario
+from app_snapshot import write_snapshot, SNAPSHOT_DIR as DEFAULT_SNAPSHOT_DIR, SNAPSHOT_KEEP as DEFAULT_SNAPSHOT_KEEP
+from app_workhour import (WorkhourAccumulator, IncrementalWorkhour, compute_range_load, compute_daily_load, merge_results,
+                          build_weeks, DEFAULT_HORIZON)
 
 
-# 讀取設定檔
-config = configparser.ConfigParser()
-config.read('./ManPowerTool.ini')
-project_key = config['JIRA']['project_key']
-
-def round1(x):
-    return float(Decimal(str(x)).quantize(Decimal('0.1'), rounding=ROUND_HALF_UP))
-
 INI_PATH = './ManPowerTool.ini'
-YEAR = datetime.now().year
-
-# ---------- Step 1: Ensure and Modify Annual Data ----------
-def ensure_annual_json(year):
-    file_path = f"{year}.json"
-    if not os.path.exists(file_path):
-        url = f"https://cdn.jsdelivr.net/gh/ruyut/TaiwanCalendar/data/{year}.json"
-        current_month = datetime.now().month
-        current_year = datetime.now().year
-        if current_month == 12 or year < current_year:
-            print(f"從網路下載: {url}")
-            response = requests.get(url)
-            if response.status_code == 200:
-                with open(file_path, "w", encoding="utf-8") as file:
-                    file.write(response.text)
-                return response.json()
-            else:
-                print(f"下載失敗: {year}")
-    with open(file_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
 
-def modify_annual_json(year):
-    data = ensure_annual_json(year)
-    # 勞動節 (5/1) 強制為假日
-    for entry in data:
-        if entry['date'][4:] == '0501':
-            entry['isHoliday'] = True
-    # 六、日為假日
-    for entry in data:
-        if entry['week'] in ['六', '日']:
-            entry['isHoliday'] = True
-    out_file = f"{year}_modify.json"
-    with open(out_file, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    return data
+# 模組參數：匯入時不讀檔，第一次使用時由 configure() 依 ManPowerTool.ini 設定
+config = None
+CONFIG_PATH = None
+# project_key 可為逗號分隔的多個部門；第一個為預設專案
+PROJECT_KEYS = []
+project_key = None
+MULTI_PROJECT = False
+# 多部門：同時抓取的專案數、計算用的 process 數 (0 = 依 CPU 數)
+PROJECT_CONCURRENCY = 4
+PROCESS_WORKERS = 0
+# sync_mode: full (每次重抓整個專案) / incremental (本地 Store 增量同步)
+SYNC_MODE = 'full'
+STORE_PATH = './jira_store.db'
+SYNC_OVERLAP_MINUTES = 5
+# pipeline: batch (抓完再算) / streaming (邊抓邊算)
+PIPELINE_MODE = 'batch'
+DUMP_TASKS_JSON = True
+# engine: loop (逐筆計算) / numpy (向量化計算) / incremental (只重算變更的子項目，process 內保留快取)
+ENGINE = 'loop'
+# 規劃週數 (預設 3 週：本周/下周/下下周)
+HORIZON_WEEKS = DEFAULT_HORIZON
+# output_format: json (相容格式) / sqlite (精簡格式，GUI 可延遲讀取明細) / both
+OUTPUT_FORMAT = 'json'
+# 量測紀錄位置與 profile 模式 (off / cprofile / tracemalloc)
+METRICS_DIR = app_metrics.METRICS_DIR
+PROFILE_MODE = 'off'
+# 版本化快照：CLI/daemon/GUI 更新成功後寫入，GUI 開啟時直接讀取最新版本
+SNAPSHOT_DIR = DEFAULT_SNAPSHOT_DIR
+SNAPSHOT_KEEP = DEFAULT_SNAPSHOT_KEEP
+# 週工時歷史 (空字串為停用)；近 history_full_days 天保留每次更新，之後每天一筆，超過 history_keep_days 刪除
+HISTORY_DB = HISTORY_PATH
+HISTORY_FULL_DAYS = FULL_DAYS
+HISTORY_KEEP_DAYS = KEEP_DAYS
+# 離線模式：不連 JIRA 與日曆 CDN，以本地 tasks 與假日資料重新計算
+OFFLINE = False
+
+
+def configure(ini_path=None, offline=None):
+    """讀取設定檔並設定模組參數 (整個 process 共用一份)；ini_path 為 None 時使用 ./ManPowerTool.ini。
+    offline 不為 None 時覆寫設定檔的 offline"""
+    global config, CONFIG_PATH, PROJECT_KEYS, project_key, MULTI_PROJECT, PROJECT_CONCURRENCY, PROCESS_WORKERS
+    global SYNC_MODE, STORE_PATH, PIPELINE_MODE, DUMP_TASKS_JSON, ENGINE, HORIZON_WEEKS, OUTPUT_FORMAT
+    global METRICS_DIR, PROFILE_MODE, SNAPSHOT_DIR, SNAPSHOT_KEEP, HISTORY_DB, HISTORY_FULL_DAYS, HISTORY_KEEP_DAYS
+    global OFFLINE
+    config = load_config(ini_path)
+    CONFIG_PATH = ini_path
+    section = config['JIRA']
+    PROJECT_KEYS = parse_project_keys(section['project_key'])
+    project_key = PROJECT_KEYS[0]
+    MULTI_PROJECT = len(PROJECT_KEYS) > 1
+    PROJECT_CONCURRENCY = section.getint('project_concurrency', 4)
+    PROCESS_WORKERS = section.getint('process_workers', 0)
+    SYNC_MODE = section.get('sync_mode', 'full')
+    STORE_PATH = section.get('store_path', './jira_store.db')
+    PIPELINE_MODE = section.get('pipeline', 'batch')
+    DUMP_TASKS_JSON = section.getboolean('dump_tasks_json', True)
+    ENGINE = section.get('engine', 'loop')
+    HORIZON_WEEKS = section.getint('horizon_weeks', DEFAULT_HORIZON)
+    OUTPUT_FORMAT = section.get('output_format', 'json')
+    METRICS_DIR = section.get('metrics_dir', app_metrics.METRICS_DIR)
+    PROFILE_MODE = section.get('profile', 'off')
+    SNAPSHOT_DIR = section.get('snapshot_dir', DEFAULT_SNAPSHOT_DIR)
+    SNAPSHOT_KEEP = section.getint('snapshot_keep', DEFAULT_SNAPSHOT_KEEP)
+    HISTORY_DB = section.get('history_path', HISTORY_PATH)
+    HISTORY_FULL_DAYS = section.getint('history_full_days', FULL_DAYS)
+    HISTORY_KEEP_DAYS = section.getint('history_keep_days', KEEP_DAYS)
+    OFFLINE = section.getboolean('offline', False) if offline is None else offline
+    get_http().offline = OFFLINE
+    return config
+
+
+def configured(fn):
+    """尚未設定時先以預設路徑呼叫 configure()"""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        if config is None:
+            configure()
+        return fn(*args, **kwargs)
+    return wrapper
+
+# ---------- Step 1: Holiday Calendar ----------
+@app_metrics.timed('calendar')
+@configured
+def load_calendar():
+    """本年度 + 規劃區間 (含相鄰年度) 的 WorkdayCalendar"""
+    return get_calendar_service().calendar_for(datetime.now(), HORIZON_WEEKS)
 
 # ---------- Step 2: Fetch JIRA Tasks and Save JSON ----------
-def fetch_jira_issues(progress_callback=None):
-    config = configparser.ConfigParser()
-    config.read('./ManPowerTool.ini')
-    server = config['JIRA']['server']
-    api_token = config['JIRA']['api_token']
-
+# resolutiondate 供 14 天結案規則使用；updated 供增量同步與除錯
+FIELDS_TO_FETCH = [
+    "key", "summary", "issuetype", "status", "assignee",
+    "customfield_10109", "customfield_10110", "customfield_12046", "parent",
+    "resolutiondate", "updated"
+]
+
+
+def connect_jira():
+    # 共用連線：重複更新時沿用同一個 client 與 keep-alive 連線池
+    if OFFLINE:
+        print("📴 離線模式：不連線 JIRA，使用本地資料")
+        return None
     try:
-        jira = JIRA(server=server, token_auth=api_token, max_retries=0)
+        jira = get_connection().client()
         print("✅ JIRA 連線成功！")
+        return jira
     except Exception as e:
         print(f"❌ JIRA 連線失敗：{e}")
-        return []
+        return None
+
+
+def normalize_issue(issue):
+    """jira.Issue 或 search 原始 JSON (raw_json) 的 issue dict 轉為 task"""
+    if isinstance(issue, dict):
+        return normalize_raw_issue(issue)
+
+    def get_value(f, sub=None):
+        val = getattr(issue.fields, f, None)
+        if not val: return 'NA'
+        return getattr(val, sub, 'NA') if sub else val
+
+    return build_task(issue.key, get_value)
+
+
+def normalize_raw_issue(raw):
+    """直接讀取 JSON dict，不建立 jira.Issue/Resource 物件；取值語意與 normalize_issue 相同"""
+    fields = raw['fields']
+
+    def get_value(f, sub=None):
+        val = fields.get(f)
+        if not val: return 'NA'
+        return val.get(sub, 'NA') if sub else val
+
+    return build_task(raw['key'], get_value)
+
+
+def issue_key(issue):
+    return issue['key'] if isinstance(issue, dict) else issue.key
+
+
+def build_task(key, get_value):
+    ts = get_value("customfield_10109")
+    te = get_value("customfield_10110")
+    if ts != 'NA': ts = ts.replace('-', '')
+    if te != 'NA': te = te.replace('-', '')
+    resdate = get_value("resolutiondate")
+    # 格式正規化
+    if resdate and resdate != 'NA' and isinstance(resdate, str) and 'T' not in resdate:
+        resdate = None
+
+    return {
+        "Issue": key,
+        "IssueType": get_value("issuetype", "name"),
+        "Summary": get_value("summary"),
+        "Status": get_value("status", "name"),
+        "Assignee": get_value("assignee", "displayName"),
+        "Target Start": ts,
+        "Target End": te,
+        "Man-hour": get_value("customfield_12046"),
+        "Parent": get_value("parent", "key"),
+        "resolutiondate": resdate,
+        "updated": get_value("updated")
+    }
 
-    jql_query = f"project = {project_key}"
-    fields_to_fetch = [
-        "key", "summary", "issuetype", "status", "assignee",
-        "customfield_10109", "customfield_10110", "customfield_12046", "parent"
-    ]
-    fields_arg = ",".join(fields_to_fetch)
-    total_count = jira.search_issues(jql_query, maxResults=1, fields=fields_arg).total
-    print(f"📊 JIRA 共找到 {total_count} 筆 Issue")
-
-    batch_size = int(config['JIRA'].get('batch_size', '100'))
-    issues = []
-    for start in range(0, total_count, batch_size):
-        batch = jira.search_issues(
-            jql_query,
-            startAt=start,
-            maxResults=batch_size,
-            fields=fields_arg
-        )
-        issues.extend(batch)
-        # 新增進度回報
-        if progress_callback is not None:
-            progress_callback(min(start + batch_size, total_count), total_count)
-        print(f"➡️ 已抓取 {min(start+batch_size, total_count)}/{total_count}")
-
-
-
-    def fetch_issues(start_at):
-        return jira.search_issues(jql_query, startAt=start_at, maxResults=200, fields=fields_to_fetch)
-
-    issues = []
-    with ThreadPoolExecutor(5) as executor:
-        futures = [executor.submit(fetch_issues, start) for start in range(0, total_count, 200)]
-        for future in as_completed(futures):
-            issues.extend(future.result())
 
+@configured
+def make_fetcher(jira, cancel_event=None):
+    return PageFetcher.from_config(jira, config['JIRA'], cancel_event)
+
+
+@configured
+def fetch_jira_issues(progress_callback=None, cancel_event=None, project=None):
+    project = project or project_key
+    jira = connect_jira()
+    if jira is None:
+        return []
+
+    # 固定排序，分頁並行抓取時才不會重複或遺漏
+    jql_query = f"project = {project} ORDER BY key ASC"
+    # 每頁抵達即正規化並釋放原始資料，不同時保留整個專案的 issue JSON；
+    # normalize 與等待下載交錯進行，fetch 記錄扣除 normalize 後的時間，兩者不重複計算
     task_data = []
-    for issue in issues:
-        def get_value(f, sub=None):
-            val = getattr(issue.fields, f, None)
-            if not val: return 'NA'
-            return getattr(val, sub, 'NA') if sub else val
-
-        ts = get_value("customfield_10109")
-        te = get_value("customfield_10110")
-        if ts != 'NA': ts = ts.replace('-', '')
-        if te != 'NA': te = te.replace('-', '')
-        resdate = get_value("resolutiondate")
-        # 格式正規化
-        if resdate and resdate != 'NA' and isinstance(resdate, str) and 'T' not in resdate:
-            resdate = None
-
-        task_data.append({
-            "Issue": issue.key,
-            "IssueType": get_value("issuetype", "name"),
-            "Summary": get_value("summary"),
-            "Status": get_value("status", "name"),
-            "Assignee": get_value("assignee", "displayName"),
-            "Target Start": ts,
-            "Target End": te,
-            "Man-hour": get_value("customfield_12046"),
-            "Parent": get_value("parent", "key"),
-            "resolutiondate": resdate
-        })
-
-    with open("Jira_Tasks.json", "w", encoding="utf-8") as f:
-        json.dump(task_data, f, ensure_ascii=False, indent=2)
-    print("📂 Jira_Tasks.json 產生完成")
+    started = time.perf_counter()
+    normalize_seconds = 0.0
+    try:
+        for _, page in make_fetcher(jira, cancel_event).iter_pages(jql_query, FIELDS_TO_FETCH, progress_callback):
+            page_started = time.perf_counter()
+            task_data.extend(normalize_issue(issue) for issue in page)
+            normalize_seconds += time.perf_counter() - page_started
+    finally:
+        app_metrics.add_time('fetch', time.perf_counter() - started - normalize_seconds)
+        app_metrics.add_time('normalize', normalize_seconds)
+    print(f"📊 {project} 共抓取 {len(task_data)} 筆 Issue")
+    app_metrics.count('issues_fetched', len(task_data))
+
+    write_tasks(task_data, project)
     return task_data
 
+# ---------- Step 2b: Incremental Sync to Local Store ----------
+@configured
+def sync_jira_issues(progress_callback=None, cancel_event=None, project=None):
+    """只抓取上次同步後有更新的 Issue 並寫入本地 Store，再以輕量的 key 清單處理刪除/移動"""
+    project = project or project_key
+    jira = connect_jira()
+    if jira is None:
+        return 0
+
+    with IssueStore(STORE_PATH) as store:
+        last_sync = store.get_last_sync(project)
+        jql_query = f"project = {project}"
+        if last_sync is None:
+            print("📦 本地 Store 為空，執行完整同步")
+        else:
+            # 往前重疊幾分鐘，避免 JQL 分鐘精度漏抓；JQL 的時間以 JIRA 使用者的時區解讀
+            since = jql_time(last_sync - timedelta(minutes=SYNC_OVERLAP_MINUTES), jira)
+            jql_query += f' AND updated >= "{since}"'
+            print(f"🔄 增量同步：{since} (JIRA 使用者時區) 之後的更新")
+
+        fetcher = make_fetcher(jira, cancel_event)
+        with app_metrics.span('fetch'):
+            issues = fetcher.fetch_all(f"{jql_query} ORDER BY key ASC", FIELDS_TO_FETCH, progress_callback)
+        app_metrics.count('issues_fetched', len(issues))
+        with app_metrics.span('normalize'):
+            task_data = [normalize_issue(issue) for issue in issues]
+        with app_metrics.span('write_tasks'):
+            changed = store.upsert(project, task_data)
+        print(f"➡️ 更新 {changed} 筆 Issue")
+
+        # 刪除/移出專案的 Issue：筆數不一致時才抓 key 清單比對
+        stale = []
+        if last_sync is not None:
+            with app_metrics.span('reconcile'):
+                server_total = jira.search_issues(f"project = {project}", maxResults=1, fields="key").total
+                if server_total != store.count(project):
+                    live = fetcher.fetch_all(f"project = {project} ORDER BY key ASC", ["key"])
+                    stale = store.delete_missing(project, [issue_key(issue) for issue in live])
+                    print(f"🗑️ 移除 {len(stale)} 筆已刪除或移出的 Issue")
+
+        # 以伺服器的 updated 作為下次同步的起點，不受本機時鐘與時區影響；本次沒有更新時沿用上次
+        latest = max(filter(None, (parse_jira_time(t['updated']) for t in task_data)), default=None)
+        if latest is not None and (last_sync is None or latest > last_sync):
+            store.set_last_sync(project, latest)
+    record_sync_changes(project, task_data, stale, full=last_sync is None)
+    return changed
+
+
+def parse_jira_time(value):
+    """JIRA 時間字串 (例如 2025-01-02T09:30:00.000+0800) → 含時區的 datetime；無法解析時為 None"""
+    try:
+        return datetime.strptime(value, '%Y-%m-%dT%H:%M:%S.%f%z')
+    except (TypeError, ValueError):
+        return None
+
+
+def jira_timezone(jira):
+    """JIRA 使用者設定的時區 (JQL 日期的解讀時區)；無法取得時為 None"""
+    try:
+        name = jira.myself().get('timeZone')
+        return ZoneInfo(name) if name else None
+    except Exception as e:
+        print(f"⚠️ 無法取得 JIRA 使用者時區：{e}")
+        return None
+
+
+def jql_time(when, jira):
+    """JQL 的 "YYYY-MM-DD HH:MM"：轉換為 JIRA 使用者的時區；取不到時沿用 JIRA 回傳時間本身的時區"""
+    tz = jira_timezone(jira)
+    return (when.astimezone(tz) if tz is not None else when).strftime('%Y-%m-%d %H:%M')
+
+
+def tasks_in_store():
+    """tasks 存放於本地 Store (jira_store.db)；否則為 Jira_Tasks.json。
+    多部門一律走批次流程 (write_tasks)，streaming 的 dump_tasks_json 設定不適用"""
+    return (SYNC_MODE == 'incremental' or OUTPUT_FORMAT in ('sqlite', 'both')
+            or (PIPELINE_MODE == 'streaming' and not DUMP_TASKS_JSON and not MULTI_PROJECT))
+
+
+def tasks_json_path(project=None):
+    # 單一專案沿用 Jira_Tasks.json；多部門時每個部門一個檔案
+    return f'Jira_Tasks_{project}.json' if project and MULTI_PROJECT else 'Jira_Tasks.json'
+
+
+@app_metrics.timed('write_tasks')
+@configured
+def write_tasks(task_data, project=None):
+    # sqlite/both：寫入本地 Store (整個專案替換)；json/both：相容的 Jira_Tasks.json
+    project = project or project_key
+    if OUTPUT_FORMAT in ('sqlite', 'both'):
+        with IssueStore(STORE_PATH) as store:
+            store.replace_all(project, task_data)
+        print(f"📂 {STORE_PATH} 更新完成")
+    if OUTPUT_FORMAT in ('json', 'both'):
+        path = tasks_json_path(project)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(task_data, f, ensure_ascii=False, indent=2)
+        print(f"📂 {path} 產生完成")
+
+
+@app_metrics.timed('load_tasks')
+@configured
+def load_tasks(project=None):
+    project = project or project_key
+    if tasks_in_store():
+        with IssueStore(STORE_PATH) as store:
+            return store.load_tasks(project)
+    with open(tasks_json_path(project), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+@configured
+def iter_task_records(project=None):
+    """逐筆讀取 tasks 並轉為精簡的 TaskRecord；不保留完整 task list，供 loop 引擎直接累加"""
+    project = project or project_key
+    if tasks_in_store():
+        with IssueStore(STORE_PATH) as store:
+            yield from iter_records(store.iter_tasks(project))
+    else:
+        yield from iter_records(iter_json_array(tasks_json_path(project)))
+
 # ---------- Step 3: Calculate Workhour Data ----------
-def calculate_workhour():
-    year = datetime.now().year
-    annual_data = modify_annual_json(year)
-    with open('Jira_Tasks.json', 'r', encoding='utf-8') as f:
-        tasks = json.load(f)
-
-    # 產生週次資訊
-    week_map = {'日': 0, '一': 1, '二': 2, '三': 3, '四': 4, '五': 5, '六': 6}
-    date_to_week = {}
-    for entry in annual_data:
-        d = entry['date']; y, m, day = int(d[:4]), int(d[4:6]), int(d[6:])
-        code = y % 10
-        wd = week_map[entry['week']]
-        wn = 1 if (m == 1 and day <= 6) else ((m - 1) * 31 + day - 1) // 7 + 1
-        if m == 12 and day == 31 and wd != 5:
-            code = (y + 1) % 10; wn = 1
-        date_to_week[d] = f"{code}{wn:02d}"
-
-    today = datetime.now().strftime('%Y%m%d')
-    cur_week = date_to_week.get(today)
-    weeks = []
-    if cur_week:
-        num = int(cur_week[1:]); yc = cur_week[0]
-        for i in range(3):
-            wid = f"{yc}{num+i:02d}"
-            dates = sorted([d for d, w in date_to_week.items() if w == wid])
-            workdays = [d for d in dates if not next(x for x in annual_data if x['date'] == d)['isHoliday']]
-            weeks.append({
-                'wh_name': f"week_{i+1}",
-                'wh_week_id': wid,
-                'wh_week_start_date': dates[0],
-                'wh_week_end_date': dates[-1],
-                'wh_week_workdates': len(workdays),
-                'wh_week_uplimit_hours': round(len(workdays) * 8, 1),
-                'wh_week_downlimit_hours': round(len(workdays) * 8 * 0.6, 1)
-            })
-
-    w1s, w3e = weeks[0]['wh_week_start_date'], weeks[-1]['wh_week_end_date']
-    members = []
-    mains = {t['Issue']: t['Summary'] for t in tasks if t['IssueType'] == 'Manpower'}
-    subs = [t for t in tasks if t['IssueType'] == 'Sub-Manpower' and not (t['Target Start'] > w3e or t['Target End'] < w1s)]
-    by_person = defaultdict(lambda: defaultdict(list))
-    for t in subs:
-        by_person[t['Assignee']][t['Parent']].append(t)
-
-    for name, issues in by_person.items():
-        member = {'name': name, 'issue': []}
-        totals = {'week_1_hours': 0, 'week_2_hours': 0, 'week_3_hours': 0}
-        for mid, lst in issues.items():
-            block = {'main_issue': mid, 'main_issue_name': mains.get(mid, ''), 'sub_issue': []}
-            for si in lst:
-                mh = float(si['Man-hour']) if si['Man-hour'] != 'NA' else 0
-                if mh == 0.1 or mh == 0:
-                    continue
-
-                sd, ed = si['Target Start'], si['Target End']
-                valid = [e['date'] for e in annual_data if sd <= e['date'] <= ed and not e['isHoliday']]
-                wd = len(valid)
-                pd = round(mh / wd, 1) if wd else 0.0
-
-                # 三週交集天數
-                week_inter = []
-                for wk in weeks:
-                    week_dates = [d for d in valid if wk['wh_week_start_date'] <= d <= wk['wh_week_end_date']]
-                    week_inter.append(len(week_dates))
-
-                # 三週工時計算（預設值）
-                w1 = round1(mh / wd * week_inter[0]) if (wd and len(week_inter) > 0) else 0
-                w2 = round1(mh / wd * week_inter[1]) if (wd and len(week_inter) > 1) else 0
-                w3 = round1(mh / wd * week_inter[2]) if (wd and len(week_inter) > 2) else 0
-
-                # resolutiondate 判斷，若已結案+14天早於今天則三週工時歸零
-                resdate = si.get('resolutiondate', None)
-                if resdate and resdate != 'NA':
-                    try:
-                        resolved_date = dateutil.parser.parse(resdate) + timedelta(days=14)
-                        now_date = datetime.now()
-                        if resolved_date.date() < now_date.date():
-                            w1 = w2 = w3 = 0
-                    except Exception as ex:
-                        print(f"解析 resolutiondate 錯誤: {resdate}, {ex}")
-
-                block['sub_issue'].append({
-                    'sub_issue_id': si['Issue'],
-                    'sub_issue_name': si['Summary'],
-                    'sub_issue_manpower': mh,
-                    'sub_issue_work_day': wd,
-                    'sub_issue_preday_hours': pd,
-                    'sub_issue_work_day_week1': week_inter[0] if len(week_inter) > 0 else 0,
-                    'sub_issue_work_day_week2': week_inter[1] if len(week_inter) > 1 else 0,
-                    'sub_issue_work_day_week3': week_inter[2] if len(week_inter) > 2 else 0,
-                    'week_1_hours': w1,
-                    'week_2_hours': w2,
-                    'week_3_hours': w3,
-                    'resolutiondate': resdate if resdate else None
-                })
-
-                # 只有有週工時才加總
-                if w1 or w2 or w3:
-                    totals['week_1_hours'] += w1
-                    totals['week_2_hours'] += w2
-                    totals['week_3_hours'] += w3
-
-            member['issue'].append(block)
-        member['week_1_hours'] = round(totals['week_1_hours'], 1)
-        member['week_2_hours'] = round(totals['week_2_hours'], 1)
-        member['week_3_hours'] = round(totals['week_3_hours'], 1)
-        members.append(member)
-
-    with open('workhour.json', 'w', encoding='utf-8') as f:
-        json.dump({'week': weeks, 'members': members}, f, ensure_ascii=False, indent=2)
-    print('✅ workhour.json 產生完成')
+@app_metrics.timed('write_workhour')
+@configured
+def write_workhour(result, path=WORKHOUR_JSON, db_path=WORKHOUR_DB):
+    if OUTPUT_FORMAT in ('sqlite', 'both'):
+        write_workhour_db(result, db_path)
+    if OUTPUT_FORMAT in ('json', 'both'):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f'✅ {path} 產生完成')
+
+
+@configured
+def load_workhour_result(department=None):
+    """讀取最近一次的結果；sqlite 格式只讀週總計，明細由 load_member_issues 延遲讀取。
+    多部門時合併結果另附 'departments' (各部門結果)"""
+    json_path, db_path = workhour_paths(department)
+    if OUTPUT_FORMAT in ('sqlite', 'both') and os.path.exists(db_path):
+        result = load_workhour_summary(db_path)
+    else:
+        with open(json_path, 'r', encoding='utf-8') as f:
+            result = json.load(f)
+    if department is None and MULTI_PROJECT:
+        departments = {}
+        for key in PROJECT_KEYS:
+            if any(os.path.exists(p) for p in workhour_paths(key)):
+                departments[key] = load_workhour_result(key)
+        result['departments'] = departments
+    return result
+
+
+CANCEL_CHECK_TASKS = 2000      # 計算階段每累加幾筆 task 檢查一次取消
+
+
+def check_cancel(cancel_event):
+    if cancel_event is not None and cancel_event.is_set():
+        raise RefreshCancelled()
+
+
+def cancellable(tasks, cancel_event):
+    """逐筆產生 task，每 CANCEL_CHECK_TASKS 筆檢查一次取消，計算階段可中途停止"""
+    for i, t in enumerate(tasks):
+        if i % CANCEL_CHECK_TASKS == 0:
+            check_cancel(cancel_event)
+        yield t
+
+
+# incremental 引擎的快取 (每個專案、規劃週數一份)；GUI 或 daemon 重複更新時沿用
+_incremental = {}
+# 上次計算後增量同步的變更：專案 -> ({issue key: 最新的 task}, {刪除的 issue key})；incremental 引擎只套用這些差量
+_sync_changes = {}
+
+
+def record_sync_changes(project, task_data, stale, full=False):
+    """累積增量同步的變更；完整同步或該專案尚未以 incremental 引擎計算過時不記錄 (需讀取全部 tasks)"""
+    if full or not any(key[0] == project for key in _incremental):
+        _sync_changes.pop(project, None)
+        return
+    changed, deleted = _sync_changes.setdefault(project, ({}, set()))
+    for t in task_data:
+        changed[t['Issue']] = t
+        deleted.discard(t['Issue'])
+    for key in stale:
+        changed.pop(key, None)
+        deleted.add(key)
+
+
+@app_metrics.timed('calculate')
+@configured
+def compute_workhour(tasks, annual_data, engine=None, horizon=None, project=None, cancel_event=None):
+    horizon = horizon or HORIZON_WEEKS
+    engine = engine or ENGINE
+    check_cancel(cancel_event)
+    if tasks is not None and engine != 'loop' and not isinstance(tasks, list):
+        tasks = list(tasks)
+    if isinstance(tasks, list):
+        app_metrics.count('tasks', len(tasks))
+    if engine == 'numpy':
+        from app_workhour_np import compute_workhour_numpy
+        return compute_workhour_numpy(tasks, annual_data, horizon=horizon)
+    if engine == 'incremental':
+        project = project or project_key
+        key = (project, horizon)
+        inc = _incremental.get(key)
+        if inc is None:
+            inc = _incremental[key] = IncrementalWorkhour(horizon)
+        # 未傳入 tasks 時優先只套用增量同步的差量；無法套用 (首次計算、週區間或假日變更) 才讀取全部 tasks
+        pending = _sync_changes.pop(project, None)
+        result = None
+        if tasks is None and pending is not None:
+            changed, deleted = pending
+            result = inc.apply(list(changed.values()), deleted, annual_data)
+        if result is None:
+            result = inc.compute(load_tasks(project) if tasks is None else tasks, annual_data)
+        for name, n in inc.last_stats.items():
+            app_metrics.count(f'subs_{name}', n)
+        return result
+    acc = WorkhourAccumulator(annual_data, horizon=horizon)
+    acc.extend(tasks if cancel_event is None else cancellable(tasks, cancel_event))
+    if not isinstance(tasks, list):
+        app_metrics.count('tasks', acc.added)
+    return acc.result()
+
+
+@configured
+def calculate_workhour(tasks=None, engine=None, cancel_event=None):
+    annual_data = load_calendar()
+    engine = engine or ENGINE
+    if tasks is None and engine != 'incremental':
+        # loop 引擎逐筆讀取並累加 (讀取時間計入 calculate)，numpy 引擎需要完整 list；incremental 引擎自行決定是否讀取
+        tasks = iter_task_records() if engine == 'loop' else load_tasks()
+
+    result = compute_workhour(tasks, annual_data, engine, cancel_event=cancel_event)
+    # 取消時不寫入，保留上一次的輸出
+    check_cancel(cancel_event)
+    app_metrics.count_result(result)
+    write_workhour(result)
+    return result
+
+
+def load_calendar_covering(tasks, start, end):
+    """與週工時相同的日曆 (load_calendar)，再涵蓋查詢區間與區間內子項目的起訖年度；
+    子項目工時的分攤天數以完整起訖計算，start/end 只用於截取輸出"""
+    years = [int(start[:4]), int(end[:4])]
+    for t in tasks:
+        if t['IssueType'] != 'Sub-Manpower' or t['Target Start'] > end or t['Target End'] < start:
+            continue
+        years.extend(int(d[:4]) for d in (t['Target Start'], t['Target End']) if d.isdigit())
+    extra = range(min(years), max(years) + 1)
+    return get_calendar_service().calendar_for(datetime.now(), HORIZON_WEEKS, extra_years=extra)
+
+
+@configured
+def query_range_load(start, end, tasks=None):
+    """任意日期區間 (YYYYMMDD) 的人員負載，不需重跑整個流程"""
+    if tasks is None:
+        tasks = load_tasks()
+    return compute_range_load(tasks, load_calendar_covering(tasks, start, end), start, end)
+
+
+@configured
+def query_daily_load(start=None, end=None, department=None, tasks=None):
+    """每位人員的每日負載 (峰值、超過 8 小時的天數與首次超載日)；未指定區間時為目前規劃週。
+    多部門且未指定部門時合併所有部門的 tasks"""
+    if start is None or end is None:
+        weeks = build_weeks(load_calendar(), horizon=HORIZON_WEEKS)
+        if not weeks:
+            return None
+        start = start or weeks[0]['wh_week_start_date']
+        end = end or weeks[-1]['wh_week_end_date']
+    if tasks is None:
+        keys = [department] if department else PROJECT_KEYS
+        tasks = [t for key in keys for t in load_tasks(key)]
+    return compute_daily_load(tasks, load_calendar_covering(tasks, start, end), start, end)
+
+@configured
+def start_scenario(department=None, tasks=None):
+    """以本地 tasks 建立 what-if 模擬；多部門且未指定部門時合併所有部門的 tasks"""
+    if tasks is None:
+        keys = [department] if department else PROJECT_KEYS
+        tasks = [t for key in keys for t in load_tasks(key)]
+    return Scenario(tasks, load_calendar(), horizon=HORIZON_WEEKS)
+
+# ---------- Step 2+3: Streaming Fetch-to-Compute ----------
+STORE_BATCH = 1000     # 串流寫入本地 Store 的批次筆數
+
+
+def stream_jira_tasks(jira, progress_callback=None, cancel_event=None):
+    """逐頁產生 normalize 後的 task；後續頁面在背景繼續下載"""
+    jql_query = f"project = {project_key} ORDER BY key ASC"
+    for _, page in make_fetcher(jira, cancel_event).iter_pages(jql_query, FIELDS_TO_FETCH, progress_callback):
+        for issue in page:
+            yield normalize_issue(issue)
+
+
+@configured
+def run_streaming(progress_callback=None, dump_tasks=None, engine=None, cancel_event=None):
+    """下載與計算重疊：每頁抵達即正規化並累加至人員工時，結果與批次版相同。
+    dump_tasks 為 False 時不輸出 Jira_Tasks.json，tasks 改為逐批寫入本地 Store，供 load_tasks 讀取"""
+    if dump_tasks is None:
+        dump_tasks = DUMP_TASKS_JSON
+    jira = connect_jira()
+    if jira is None:
+        return None
+
+    annual_data = load_calendar()
+    # numpy/incremental 引擎需要完整 task 清單，串流時僅收集 task，最後一次計算
+    engine = engine or ENGINE
+    collect = engine in ('numpy', 'incremental')
+    acc = None if collect else WorkhourAccumulator(annual_data, horizon=HORIZON_WEEKS)
+    task_data = [] if (dump_tasks or collect) else None
+    fetched = 0
+    with ExitStack() as stack:
+        persist, pending = None, []
+        if not dump_tasks:
+            store = stack.enter_context(IssueStore(STORE_PATH))
+            persist = stack.enter_context(store.replacing(project_key))
+        # 下載、正規化與累加交錯進行，合併為一個 span
+        with app_metrics.span('stream_fetch_compute'):
+            for task in stream_jira_tasks(jira, progress_callback, cancel_event):
+                fetched += 1
+                if acc is not None:
+                    acc.add(task)
+                if task_data is not None:
+                    task_data.append(task)
+                if persist is not None:
+                    pending.append(task)
+                    if len(pending) >= STORE_BATCH:
+                        persist(pending)
+                        pending = []
+            if persist is not None:
+                persist(pending)
+    app_metrics.count('issues_fetched', fetched)
+
+    if dump_tasks:
+        write_tasks(task_data)
+    else:
+        print(f"📂 {STORE_PATH} 更新完成")
+
+    if acc is not None:
+        with app_metrics.span('calculate'):
+            result = acc.result()
+    else:
+        result = compute_workhour(task_data, annual_data, engine)
+    app_metrics.count_result(result)
+    write_workhour(result)
+    return result
+
+# ---------- Multi-Department Batch ----------
+_worker_calendar = None
+
+
+def _init_compute_worker(calendar, ini_path=None):
+    # 每個 process 只接收一次日曆，之後各部門共用；spawn 的 process 需重新讀取同一份設定檔
+    global _worker_calendar
+    if ini_path is not None or config is None:
+        configure(ini_path)
+    _worker_calendar = calendar
+
+
+def _compute_department(project, tasks, engine, cancel_event=None):
+    if tasks is None and (engine or ENGINE) != 'incremental':
+        tasks = load_tasks(project)
+    result = compute_workhour(tasks, _worker_calendar, engine, project=project, cancel_event=cancel_event)
+    check_cancel(cancel_event)
+    write_workhour(result, *workhour_paths(project))
+    return project, result
+
+
+def fetch_departments(progress_callback=None, cancel_event=None):
+    """各部門同時抓取 (共用 JIRA 連線池)；回傳 {部門: tasks}，增量同步時 tasks 為 None (由 Store 讀取)"""
+    progress = {}
+    lock = threading.Lock()
+
+    def reporter(project):
+        def report(current, total):
+            with lock:
+                progress[project] = (current, total)
+                done = sum(c for c, _ in progress.values())
+                total_all = sum(t for _, t in progress.values())
+            if progress_callback is not None:
+                progress_callback(done, total_all)
+        return report
+
+    def fetch(project):
+        if SYNC_MODE == 'incremental':
+            sync_jira_issues(reporter(project), cancel_event, project)
+            return project, None
+        # 連線失敗時回傳空 list，改讀上一次的輸出
+        return project, fetch_jira_issues(reporter(project), cancel_event, project) or None
+
+    workers = max(1, min(PROJECT_CONCURRENCY, len(PROJECT_KEYS)))
+    with ThreadPoolExecutor(workers) as pool:
+        return dict(pool.map(fetch, PROJECT_KEYS))
+
+
+def calculate_departments(fetched, engine=None, cancel_event=None):
+    """各部門的工時計算分散到 process pool；日曆於 worker 啟動時傳入一次。
+    取消時尚未開始的部門不再計算 (process 內進行中的部門無法中斷，結果捨棄)"""
+    calendar = load_calendar()
+    workers = PROCESS_WORKERS or min(len(fetched), os.cpu_count() or 1)
+    if (engine or ENGINE) == 'incremental':
+        # 快取保留在本 process，不分散到 process pool
+        workers = 1
+    results = {}
+    if workers <= 1:
+        # compute_workhour / write_workhour / load_tasks 各自記錄 span，外層不再重複計時
+        _init_compute_worker(calendar)
+        for project, tasks in fetched.items():
+            results[project] = _compute_department(project, tasks, engine, cancel_event)[1]
+    else:
+        # 子 process 的 span 不回傳，以整段 process pool 的時間記為 calculate
+        with app_metrics.span('calculate'):
+            # spawn：GUI 的背景 thread 中 fork 不安全，各平台行為一致
+            context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(workers, mp_context=context, initializer=_init_compute_worker,
+                                     initargs=(calendar, CONFIG_PATH)) as pool:
+                futures = [pool.submit(_compute_department, project, tasks, engine)
+                           for project, tasks in fetched.items()]
+                pending = set(futures)
+                while pending:
+                    # 定期醒來檢查取消，不必等所有部門算完
+                    _, pending = wait(pending, timeout=0.2)
+                    if cancel_event is not None and cancel_event.is_set():
+                        for future in pending:
+                            future.cancel()
+                        raise RefreshCancelled()
+                for future in futures:
+                    project, result = future.result()
+                    results[project] = result
+    return {key: results[key] for key in PROJECT_KEYS}
+
+
+def run_departments(progress_callback=None, engine=None, stage=None, cancel_event=None):
+    """多部門批次：各部門輸出 workhour_{部門}.json，合併的跨部門人員檢視輸出 workhour.json"""
+    # 離線時各部門直接讀取本地 tasks
+    fetched = dict.fromkeys(PROJECT_KEYS) if OFFLINE else fetch_departments(progress_callback, cancel_event)
+    check_cancel(cancel_event)
+    if stage is not None:
+        stage('計算工時')
+    results = calculate_departments(fetched, engine, cancel_event)
+    check_cancel(cancel_event)
+    with app_metrics.span('merge'):
+        combined = merge_results(list(results.values()))
+    app_metrics.count_result(combined)
+    write_workhour(combined)
+    # departments 不寫入檔案，供 GUI 切換部門
+    return dict(combined, departments=results)
+
+# ---------- Snapshot ----------
+@app_metrics.timed('history')
+@configured
+def record_history(result, taken=None):
+    """更新結果寫入週工時歷史 (只記錄有變動的值) 並套用保留規則；失敗時不影響更新"""
+    if not HISTORY_DB:
+        return
+    departments = {ALL_DEPARTMENTS: result}
+    departments.update(result.get('departments') or {})
+    try:
+        with HistoryStore(HISTORY_DB) as history:
+            changed = history.append(departments, taken)
+            history.compact(HISTORY_FULL_DAYS, HISTORY_KEEP_DAYS)
+        app_metrics.count('history_points', changed)
+    except sqlite3.Error as e:
+        print(f"⚠️ 工時歷史寫入失敗：{e}")
+
+
+def save_snapshot(result, engine=None, duration=None):
+    return write_snapshot(result, SNAPSHOT_DIR, SNAPSHOT_KEEP, project_keys=PROJECT_KEYS,
+                          engine=engine or ENGINE, duration=duration)
 
 # ---------- Entry Point ----------
-def main(progress_callback=None):
-    fetch_jira_issues(progress_callback)
-    calculate_workhour()
+@configured
+def main(progress_callback=None, engine=None, stage_callback=None, cancel_event=None):
+    """執行完整更新並回傳 workhour 結果；cancel_event 被設定時拋出 RefreshCancelled"""
+    # 各階段耗時、計數與分頁延遲寫入 METRICS_DIR 的 rotating log，GUI 可讀取 app_metrics.last_refresh()
+    # 上次更新取不到的假日年度 (例如尚未發布的下一年度) 重新嘗試
+    get_calendar_service().retry_missing()
+    with app_metrics.refresh_run(','.join(PROJECT_KEYS), PROFILE_MODE, METRICS_DIR):
+        result = run_refresh(progress_callback, engine, stage_callback, cancel_event)
+        if result is not None:
+            record_history(result)
+        return result
+
+
+def run_refresh(progress_callback=None, engine=None, stage_callback=None, cancel_event=None):
+    def stage(name):
+        if stage_callback is not None:
+            stage_callback(name)
+
+    stage('抓取資料')
+    if MULTI_PROJECT:
+        # 多部門一律批次模式 (計算分散到 process pool)
+        return run_departments(progress_callback, engine, stage, cancel_event)
+    if OFFLINE:
+        # 離線：不抓取，直接以本地 tasks 計算
+        print("📴 離線模式：使用本地 tasks 計算")
+    elif PIPELINE_MODE == 'streaming' and SYNC_MODE != 'incremental':
+        return run_streaming(progress_callback, engine=engine, cancel_event=cancel_event)
+    elif SYNC_MODE == 'incremental':
+        sync_jira_issues(progress_callback, cancel_event)
+    else:
+        fetch_jira_issues(progress_callback, cancel_event)
+
+    check_cancel(cancel_event)
+    stage('計算工時')
+    return calculate_workhour(engine=engine, cancel_event=cancel_event)
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,75 @@
+import configparser
+import threading
+
+from app_http import get_http, pool_size_for
+
+INI_PATH = './ManPowerTool.ini'
+
+_config = None
+_connection = None
+_lock = threading.Lock()
+
+
+def load_config(ini_path=None):
+    """ManPowerTool.ini 每個 process 只讀一次；明確指定路徑 (例如 CLI 的 --config) 時重新讀取"""
+    global _config, _connection
+    if _config is None or ini_path is not None:
+        config = configparser.ConfigParser()
+        config.read(ini_path or INI_PATH, encoding='utf-8')
+        _config = config
+        _connection = None
+    return _config
+
+
+def parse_project_keys(value):
+    """project_key 可填多個部門，以逗號分隔"""
+    keys = [k.strip() for k in value.split(',') if k.strip()]
+    return list(dict.fromkeys(keys))
+
+
+# ---------- 共用 JIRA 連線 ----------
+class JiraConnection:
+    """延遲建立的共用 JIRA client；所有抓取共用同一個 keep-alive Session 連線池"""
+
+    def __init__(self, config):
+        section = config['JIRA']
+        self.server = section['server']
+        self.api_token = section['api_token']
+        self.project_keys = parse_project_keys(section['project_key'])
+        self.project_key = self.project_keys[0]
+        self.timeout = section.getfloat('timeout', 30.0)
+        # 多個專案同時抓取時共用同一個連線池 (與日曆下載共用 app_http 的 adapter)
+        self.pool_size = pool_size_for(section)
+        self._client = None
+        self._lock = threading.Lock()
+
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                from jira import JIRA   # 匯入 jira 套件本身也要時間，延後到第一次使用
+                # get_server_info=False：建立時不發任何請求
+                client = JIRA(server=self.server, token_auth=self.api_token, max_retries=0,
+                              get_server_info=False, timeout=self.timeout)
+                get_http().mount(client._session)
+                self._client = client
+            return self._client
+
+    def check_login(self):
+        if get_http().offline:
+            return False
+        user = self.client().current_user()
+        return bool(user)
+
+    def reset(self):
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+            self._client = None
+
+
+def get_connection():
+    global _connection
+    with _lock:
+        if _connection is None:
+            _connection = JiraConnection(load_config())
+        return _connection
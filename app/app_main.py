@@ -1,12 +1,19 @@
-from PyQt5.QtGui import QStandardItemModel, QStandardItem, QColor, QBrush
-from PyQt5.QtWidgets import QApplication, QMainWindow
-from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import (QApplication, QMainWindow, QDockWidget, QTreeView, QTableView, QLineEdit, QPushButton,
+                             QComboBox, QLabel, QWidget, QHBoxLayout, QVBoxLayout, QDialog, QDialogButtonBox,
+                             QFormLayout, QDoubleSpinBox, QFileDialog)
+from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtWidgets import QProgressDialog, QMessageBox
 import sys
-import configparser
-import json
-from jira import JIRA
-import app_init
+import time
+from datetime import datetime
+import app_metrics
+from app_snapshot import snapshot_age, format_age
+from app_worker import RefreshWorker, LoginWorker, SnapshotWorker, DailyLoadWorker, start_refresh, start_worker
+from app_jira_client import get_connection, load_config
+from app_http import get_http
+from app_history import HistoryStore, HISTORY_PATH, ALL_DEPARTMENTS
+from app_output import load_member_issues, workhour_paths
+from app_table_model import MemberHoursModel, MemberFilterProxyModel, DailyLoadModel, build_issue_model, build_trend_model
 
 # 顯示 main_ui
 from main_ui import *
@@ -17,70 +24,52 @@ class Demo(QMainWindow, Ui_MainWindow):
         self.ui = Ui_MainWindow()
         self.ui.setupUi(self)
         self.mbLogin = False
+        self.mEngine = None     # None: 依 ManPowerTool.ini 的 engine 設定
+        self.mjMembersData = {}
+        self.mResults = {}          # 部門 -> 結果；None 為合併 (或單一部門) 結果
+        self.mDepartment = None
+        self.mDataTime = None       # 目前顯示資料的產生時間
+        self.mScenario = None       # what-if 模擬中時為 app_scenario.Scenario
+        self.mMemberName = None     # 人員明細目前顯示的人員
+        self.mWorker = None
+        self.mRefreshThread = None
+        self.mProgress = None
+        self.mStage = "資料抓取中"
         self.initSetup()
 
         self.ui.lblLogin.setAlignment(Qt.AlignCenter)   #設定登入顯示狀態
-        if self.mbLogin:
-            self.ui.lblLogin.setText("已登入")
-            self.ui.lblLogin.setStyleSheet('''
-                        border-radius: 10px;
-                        font-size: 11px;
-                        color: #FFF;
-                        background-color: rgb(48, 128, 20);
-                    ''')
-
-        else:
-            self.ui.lblLogin.setText("未登入")
-            self.ui.lblLogin.setStyleSheet('''
-                        border-radius: 10px;
-                        font-size: 11px;
-                        color: #FFF;
-                        background-color: #E3170D;
-                    ''')
+        self.setLoginStatus(self.mbLogin)
 
         #設定buttonGroup
         self.ui.buttonGroup.setId(self.ui.rbOriginAlgo, 1)
         self.ui.buttonGroup.setId(self.ui.rbModAlgo, 2)
         self.ui.buttonGroup.buttonClicked.connect(self.getSelectedAlgorithm)
 
-        # 設定 Model
-        self.mModel = QStandardItemModel(3, 3)
-        self.mModel.setHorizontalHeaderLabels(['本周', '下周', '下下周'])
-        self.ui.tvShowMembersManHours.setModel(self.mModel)
+        # 設定 Model (陣列資料 + 排序/篩選 proxy)
+        self.mModel = MemberHoursModel(self)
+        self.mProxy = MemberFilterProxyModel(self)
+        self.mProxy.setSourceModel(self.mModel)
+        self.ui.tvShowMembersManHours.setModel(self.mProxy)
+        self.ui.tvShowMembersManHours.setSortingEnabled(True)
         self.ui.pbGenRefreshData.clicked.connect(self.generateAndRefresh)
         self.ui.tvShowMembersManHours.clicked.connect(self.clickedMembers)
+        self.initIssueView()
+        self.initDailyLoad()
+        self.initTrendView()
+        self.initScenario()
+        self.initMemberFilter()
+        self.initRefreshBreakdown()
+        self.initDepartmentSelector()
+        self.initSnapshot()
 
     def initSetup(self):
+        # 設定只讀一次；JIRA 登入在背景檢查，視窗可立即開啟
+        keys = get_connection().project_keys
+        department = keys[0] if len(keys) == 1 else "全部部門"
 
-        #暫時跳過Jira登入
-        config = configparser.ConfigParser()
-        config.read('./ManPowerTool.ini')
-        server = config['JIRA']['server']
-        api_token = config['JIRA']['api_token']
-        department = config['JIRA']['project_key']
-
-        # 直接模擬登入成功
-        #self.mbLogin = True
-
-        # 暫時跳過Jira登入_取消註解恢復原本
-
-        config = configparser.ConfigParser()
-        config.read('./ManPowerTool.ini')
-        server = config['JIRA']['server']
-        api_token = config['JIRA']['api_token']
-        department = config['JIRA']['project_key']
-
-        try:
-            jira = JIRA(server=server, token_auth=api_token, max_retries=0)
-            user = jira.current_user()
-            if user != None or user != '':
-                self.mbLogin = True
-            else:
-                self.mbLogin = False
-        except:
-            self.mbLogin = False
-
-
+        self.mLoginWorker = LoginWorker()
+        self.mLoginWorker.finished.connect(self.onLoginChecked)
+        self.mLoginThread = start_worker(self.mLoginWorker)
 
         #部門顯示
         self.ui.lblDepartment.setAlignment(Qt.AlignCenter)
@@ -92,30 +81,68 @@ class Demo(QMainWindow, Ui_MainWindow):
                         color: #FFF;
                         background-color: rgb(9, 111, 227);
                     ''')
+    def setLoginStatus(self, login):
+        if get_http().offline:
+            self.ui.lblLogin.setText("離線")
+            self.ui.lblLogin.setStyleSheet('''
+                        border-radius: 10px;
+                        font-size: 11px;
+                        color: #FFF;
+                        background-color: rgb(128, 128, 128);
+                    ''')
+        elif login:
+            self.ui.lblLogin.setText("已登入")
+            self.ui.lblLogin.setStyleSheet('''
+                        border-radius: 10px;
+                        font-size: 11px;
+                        color: #FFF;
+                        background-color: rgb(48, 128, 20);
+                    ''')
+
+        else:
+            self.ui.lblLogin.setText("未登入")
+            self.ui.lblLogin.setStyleSheet('''
+                        border-radius: 10px;
+                        font-size: 11px;
+                        color: #FFF;
+                        background-color: #E3170D;
+                    ''')
+
+    def onLoginChecked(self, login):
+        self.mbLogin = login
+        self.setLoginStatus(login)
+        self.mLoginWorker = None
+        self.mLoginThread = None
+
     # 選擇計算方式
     def getSelectedAlgorithm(self):
         if self.ui.buttonGroup.checkedId() == 1:
+            self.mEngine = 'loop'
             print("Selected Origin Algorithm !!")
         elif self.ui.buttonGroup.checkedId() == 2:
+            self.mEngine = 'numpy'
             print("Selected Modified Algorithm !!!")
 
     # 產生資訊及更新
     def generateAndRefresh(self):
 
-        # 1. 確認Jira連線狀態
-        if not self.mbLogin:
+        # 1. 確認Jira連線狀態 (離線模式以本地資料計算，不需登入)
+        if not self.mbLogin and not get_http().offline:
             QMessageBox.warning(self, "提示", "Jira尚未連線，請確認")
             return
 
-        # 2. 執行 app_init.py，產生最新 workhour.json
-        
-        # bypass Jira test
+        # 已有更新在執行中
+        if self.mRefreshThread is not None:
+            return
 
-        # 跳出提示視窗，阻止使用者操作，直到關閉
-        progress = QProgressDialog("資料抓取中：0%", None, 0, 100, self)
+        # 2. 於背景 thread 執行 app_init.main，產生最新 workhour.json
+
+        # 進度視窗 (可取消)，阻止使用者操作直到完成
+        progress = QProgressDialog("資料抓取中：0%", "取消", 0, 100, self)
         progress.setWindowTitle("Progess")
-        progress.setCancelButton(None)
         progress.setWindowModality(Qt.ApplicationModal)
+        progress.setAutoClose(False)
+        progress.setAutoReset(False)
         progress.setValue(0)
 
         # 隱藏 X 與 ? 按鈕
@@ -131,24 +158,133 @@ class Demo(QMainWindow, Ui_MainWindow):
         center_point = parent_geom.center()
         progress_geom.moveCenter(center_point)
         progress.move(progress_geom.topLeft())
-        QApplication.processEvents()
+        self.mProgress = progress
+
+        self.mWorker = RefreshWorker(engine=self.mEngine)
+        self.mWorker.progress.connect(self.onRefreshProgress)
+        self.mWorker.stage.connect(self.onRefreshStage)
+        self.mWorker.finished.connect(self.onRefreshFinished)
+        self.mWorker.failed.connect(self.onRefreshFailed)
+        self.mWorker.cancelled.connect(self.onRefreshCancelled)
+        progress.canceled.connect(self.cancelRefresh)
+        self.mRefreshThread = start_refresh(self.mWorker)
+
+    def cancelRefresh(self):
+        if self.mWorker is not None:
+            self.mWorker.cancel()
+            self.mProgress.setLabelText("取消中…")
+
+    def onRefreshStage(self, name):
+        self.mStage = name
+        self.mProgress.setLabelText(f"{name}…")
+
+    def onRefreshProgress(self, current, total):
+        percent = int(current * 100 / total) if total else 0
+        self.mProgress.setValue(percent)
+        self.mProgress.setLabelText(f"{self.mStage}：{percent}% ({current}/{total})")
+
+    def endRefresh(self):
+        # close() 也會發出 canceled，先斷開避免誤觸取消
+        self.mProgress.canceled.disconnect(self.cancelRefresh)
+        self.mProgress.close()
+        self.mProgress = None
+        self.mWorker = None
+        self.mRefreshThread = None
+
+    def onRefreshFailed(self, message):
+        self.endRefresh()
+        self.updateRefreshBreakdown()
+        QMessageBox.critical(self, "Jira Error", f"執行 app_init 發生錯誤：\n{message}\n請檢查網路或聯絡IT人員")
+
+    def onRefreshCancelled(self):
+        self.endRefresh()
+        self.updateRefreshBreakdown()
+        QMessageBox.information(self, "提示", "已取消更新")
+
+    def onRefreshFinished(self, data, fresh):
+        # fresh 為 False：未取得更新結果 (例如 JIRA 連線失敗)，data 為 worker 讀取的上一次輸出
+        self.mProgress.setValue(100)
+        self.endRefresh()
+        metrics = app_metrics.last_refresh()
+        if metrics is not None:
+            with metrics.span('gui_model'):
+                self.setResults(data)
+        else:
+            self.setResults(data)
+        if fresh:
+            self.setDataTime(datetime.now())
+        self.updateRefreshBreakdown()
+        if not fresh:
+            self.statusBar().showMessage("未取得更新結果，顯示上一次的輸出")
+
+    # 開啟時在背景讀取最新快照 (由 CLI daemon 或其他使用者的更新產生)，不需連線 JIRA
+    def initSnapshot(self):
+        self.mAgeLabel = QLabel("資料時間：無", self)
+        self.statusBar().insertPermanentWidget(0, self.mAgeLabel)
+        self.mAgeTimer = QTimer(self)
+        self.mAgeTimer.timeout.connect(self.updateDataAge)
+        self.mAgeTimer.start(60 * 1000)
+        self.mSnapshotWorker = SnapshotWorker()
+        self.mSnapshotWorker.finished.connect(self.onSnapshotLoaded)
+        start_worker(self.mSnapshotWorker)
+
+    def onSnapshotLoaded(self, info, result):
+        self.mSnapshotWorker = None
+        # 使用者已手動更新時不覆蓋
+        if result is None or self.mDataTime is not None:
+            return
+        self.setResults(result)
+        self.setDataTime(datetime.fromisoformat(info['created']))
 
-        # 定義 callback 更新進度條
-        def on_progress_update(current, total):
-            percent = int(current * 100 / total) if total else 0
-            progress.setValue(percent)
-            progress.setLabelText(f"資料抓取中：{percent}%")
-            QApplication.processEvents()
+    def setDataTime(self, when):
+        self.mDataTime = when
+        self.updateDataAge()
 
-        try:
-            app_init.main(progress_callback=on_progress_update)
-        except Exception as e:
-            progress.close()
-            QMessageBox.critical(self, "Jira Error", f"執行 app_init 發生錯誤：\n{e}\n請檢查網路或聯絡IT人員")
+    def updateDataAge(self):
+        if self.mDataTime is None:
             return
+        age = snapshot_age({'created': self.mDataTime.isoformat()})
+        self.mAgeLabel.setText(f"資料時間：{self.mDataTime.strftime('%Y-%m-%d %H:%M')} ({format_age(age)})")
+
+    # 多部門：保留各部門結果，切換部門時不需重新抓取
+    def setResults(self, data):
+        data = dict(data)
+        departments = data.pop('departments', None) or {}
+        self.mResults = {None: data, **departments}
+        if self.mDepartment not in self.mResults:
+            self.mDepartment = None
+            self.mDepartmentBox.blockSignals(True)
+            self.mDepartmentBox.setCurrentIndex(0)
+            self.mDepartmentBox.blockSignals(False)
+            self.ui.lblDepartment.setText("全部部門")
+        if self.mScenario is None:
+            self.showWorkhour(self.mResults[self.mDepartment])
+        self.updateDailyLoad()
+        self.updateTrendChoices()
+
+    def initDepartmentSelector(self):
+        keys = get_connection().project_keys
+        self.mDepartmentBox = QComboBox(self)
+        self.mDepartmentBox.addItem("全部部門", None)
+        for key in keys:
+            self.mDepartmentBox.addItem(key, key)
+        self.mDepartmentBox.currentIndexChanged.connect(self.onDepartmentChanged)
+        if len(keys) > 1:
+            self.statusBar().insertPermanentWidget(0, self.mDepartmentBox)
+        else:
+            self.mDepartmentBox.hide()
 
-        progress.setValue(100)
-        progress.close()
+    def onDepartmentChanged(self, index):
+        self.mDepartment = self.mDepartmentBox.itemData(index)
+        self.ui.lblDepartment.setText(self.mDepartment or "全部部門")
+        if self.mDepartment in self.mResults:
+            self.showWorkhour(self.mResults[self.mDepartment])
+            self.updateDailyLoad()
+            self.updateTrendChoices()
+
+    # 3. 更新表格
+    def showWorkhour(self, data):
+        self.mjMembersData = data
 
         #設定表頭樣式
         self.ui.tvShowMembersManHours.setShowGrid(True)
@@ -166,37 +302,338 @@ class Demo(QMainWindow, Ui_MainWindow):
         }
         """)
 
-        # 3. 讀取 workhour.json
-        with open('workhour.json', 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        members = [m['name'] for m in data['members']]
-        self.mModel.setVerticalHeaderLabels(members)
-
-        #顯示周別
-        zh_titles = ["本周", "下周", "下下周"]
-        headers = [f"{zh_titles[i]}({w['wh_week_id']})" for i, w in enumerate(data['week'])]
-        self.mModel.setHorizontalHeaderLabels(headers)
-
-        # 取得每週的上限/下限工時(預設40/24)
-        uplimits = [w.get('wh_week_uplimit_hours', 40) for w in data['week']]
-        downlimits = [w.get('wh_week_downlimit_hours', 24) for w in data['week']]
-
-        for row, m in enumerate(data['members']):
-            week_hours = [m.get('week_1_hours', 0), m.get('week_2_hours', 0), m.get('week_3_hours', 0)]
-            for col, h in enumerate(week_hours):
-                item = QStandardItem(str(h))
-                item.setTextAlignment(Qt.AlignRight)
-                # 動態判斷上/下限
-                if h > uplimits[col]:
-                    item.setForeground(QBrush(QColor(30, 144, 255)))  # 超過上限
-                elif h < downlimits[col]:
-                    item.setForeground(QBrush(QColor(176, 23, 31)))  # 低於下限
-                self.mModel.setItem(row, col, item)
-
-    # 點擊人員時的按鍵動作
-    def clickedMembers(self, item):
-        if 'members' in self.mjMembersData:
-            print(self.mjMembersData['members'][item.row()]['name'])
+        self.mModel.set_workhour(data)
+        old = self.mIssueView.model()
+        self.mIssueView.setModel(None)
+        if old is not None:
+            old.deleteLater()
+        self.mIssueDock.setWindowTitle("人員明細")
+
+    # 上次更新各階段耗時 (狀態列摘要，按鈕顯示完整明細)
+    def initRefreshBreakdown(self):
+        self.mBreakdownButton = QPushButton("上次更新明細", self)
+        self.mBreakdownButton.setEnabled(False)
+        self.mBreakdownButton.clicked.connect(self.showRefreshBreakdown)
+        self.statusBar().addPermanentWidget(self.mBreakdownButton)
+
+    def updateRefreshBreakdown(self):
+        metrics = app_metrics.last_refresh()
+        if metrics is None:
+            return
+        s = metrics.summary()
+        top = sorted(s['stages'].items(), key=lambda kv: kv[1], reverse=True)[:3]
+        self.statusBar().showMessage(f"上次更新 {s['total']:.1f}s ({s['status']})：" +
+                                     "、".join(f"{k} {v:.1f}s" for k, v in top))
+        self.mBreakdownButton.setEnabled(True)
+
+    def showRefreshBreakdown(self):
+        metrics = app_metrics.last_refresh()
+        if metrics is not None:
+            QMessageBox.information(self, "上次更新明細", metrics.format_breakdown())
+
+    # 人員篩選輸入框 (表格所在 layout 存在時才加入)
+    def initMemberFilter(self):
+        self.mFilterEdit = QLineEdit(self)
+        self.mFilterEdit.setPlaceholderText("篩選人員")
+        self.mFilterEdit.textChanged.connect(self.mProxy.setNameFilter)
+        self.mFilterEdit.textChanged.connect(self.mDailyProxy.setNameFilter)
+        table = self.ui.tvShowMembersManHours
+        layout = table.parentWidget().layout() if table.parentWidget() is not None else None
+        if layout is not None and hasattr(layout, 'insertWidget'):
+            layout.insertWidget(layout.indexOf(table), self.mFilterEdit)
+        else:
+            self.mFilterEdit.hide()
+
+    # 人員主/子項目明細 (第二個 view)
+    def initIssueView(self):
+        self.mIssueView = QTreeView(self)
+        self.mIssueView.setAlternatingRowColors(True)
+        self.mIssueDock = QDockWidget("人員明細", self)
+        self.mIssueDock.setWidget(self.mIssueView)
+        self.addDockWidget(Qt.BottomDockWidgetArea, self.mIssueDock)
+
+    # 每日負載 heat strip (與人員明細同區，以分頁切換)
+    def initDailyLoad(self):
+        self.mDailyModel = DailyLoadModel(self)
+        self.mDailyProxy = MemberFilterProxyModel(self)
+        self.mDailyProxy.setSourceModel(self.mDailyModel)
+        self.mDailyView = QTableView(self)
+        self.mDailyView.setModel(self.mDailyProxy)
+        self.mDailyView.setSortingEnabled(True)
+        self.mDailyView.horizontalHeader().setMinimumSectionSize(12)
+        self.mDailyDock = QDockWidget("每日負載", self)
+        self.mDailyDock.setWidget(self.mDailyView)
+        self.addDockWidget(Qt.BottomDockWidgetArea, self.mDailyDock)
+        self.tabifyDockWidget(self.mIssueDock, self.mDailyDock)
+        self.mIssueDock.raise_()
+        self.mDailyWorker = None
+
+    def updateDailyLoad(self):
+        # 由本地 tasks 在背景計算；較早送出的計算結果到達時忽略
+        worker = DailyLoadWorker(self.mDepartment)
+        worker.finished.connect(self.onDailyLoaded)
+        self.mDailyWorker = worker
+        start_worker(worker)
+
+    def onDailyLoaded(self, load):
+        if self.sender() is not self.mDailyWorker:
+            return
+        self.mDailyWorker = None
+        self.mDailyModel.set_daily_load(load)
+        if load is None:
+            self.mDailyDock.setWindowTitle("每日負載")
+            return
+        self.mDailyView.resizeColumnsToContents()
+        over = sum(1 for m in load['members'] if m['overload_days'])
+        self.mDailyDock.setWindowTitle(f"每日負載 {load['start_date']} ~ {load['end_date']}：{over} 人單日超過 "
+                                       f"{load['limit_hours']:g} 小時")
+
+    # 週工時歷史趨勢：選擇週別與人員 (或整個部門)，直接查詢歷史資料庫，不重算
+    def initTrendView(self):
+        self.mHistoryPath = load_config()['JIRA'].get('history_path', HISTORY_PATH)
+        self.mTrendWeekBox = QComboBox(self)
+        self.mTrendMemberBox = QComboBox(self)
+        self.mTrendView = QTableView(self)
+        self.mTrendView.verticalHeader().hide()
+        panel = QWidget(self)
+        bar = QHBoxLayout()
+        bar.addWidget(QLabel("週別", self))
+        bar.addWidget(self.mTrendWeekBox)
+        bar.addWidget(QLabel("人員", self))
+        bar.addWidget(self.mTrendMemberBox, 1)
+        layout = QVBoxLayout(panel)
+        layout.addLayout(bar)
+        layout.addWidget(self.mTrendView)
+        self.mTrendDock = QDockWidget("工時趨勢", self)
+        self.mTrendDock.setWidget(panel)
+        self.addDockWidget(Qt.BottomDockWidgetArea, self.mTrendDock)
+        self.tabifyDockWidget(self.mDailyDock, self.mTrendDock)
+        self.mIssueDock.raise_()
+        self.mTrendWeekBox.currentIndexChanged.connect(self.onTrendWeekChanged)
+        self.mTrendMemberBox.currentIndexChanged.connect(self.showTrend)
+
+    def historyDepartment(self):
+        return self.mDepartment or ALL_DEPARTMENTS
+
+    def updateTrendChoices(self):
+        if not self.mHistoryPath:
+            return
+        weeks = [w['wh_week_id'] for w in self.mjMembersData.get('week', [])]
+        with HistoryStore(self.mHistoryPath) as history:
+            known = history.week_ids(self.historyDepartment())
+        # 目前規劃週在前，其餘歷史週別由新到舊
+        choices = weeks + sorted((w for w in known if w not in weeks), reverse=True)
+        current = self.mTrendWeekBox.currentText()
+        self.mTrendWeekBox.blockSignals(True)
+        self.mTrendWeekBox.clear()
+        self.mTrendWeekBox.addItems(choices)
+        if current in choices:
+            self.mTrendWeekBox.setCurrentIndex(choices.index(current))
+        self.mTrendWeekBox.blockSignals(False)
+        self.onTrendWeekChanged()
+
+    def onTrendWeekChanged(self, index=None):
+        week_id = self.mTrendWeekBox.currentText()
+        if not week_id:
+            return
+        with HistoryStore(self.mHistoryPath) as history:
+            members = history.members(self.historyDepartment(), week_id)
+        current = self.mTrendMemberBox.currentData()
+        self.mTrendMemberBox.blockSignals(True)
+        self.mTrendMemberBox.clear()
+        self.mTrendMemberBox.addItem("整個部門", None)
+        for name in members:
+            self.mTrendMemberBox.addItem(name, name)
+        found = self.mTrendMemberBox.findData(current) if current is not None else -1
+        self.mTrendMemberBox.setCurrentIndex(max(0, found))
+        self.mTrendMemberBox.blockSignals(False)
+        self.showTrend()
+
+    def showTrend(self, index=None):
+        week_id = self.mTrendWeekBox.currentText()
+        if not week_id:
+            return
+        member = self.mTrendMemberBox.currentData()
+        with HistoryStore(self.mHistoryPath) as history:
+            if member is None:
+                trend = history.team_trend(week_id, self.historyDepartment())
+            else:
+                trend = history.member_trend(member, week_id, self.historyDepartment())
+        old = self.mTrendView.model()
+        self.mTrendView.setModel(build_trend_model(trend, self.mTrendView))
+        if old is not None:
+            old.deleteLater()
+        self.mTrendView.resizeColumnsToContents()
+        self.mTrendView.scrollToBottom()
+        self.mTrendDock.setWindowTitle(f"工時趨勢：{member or '整個部門'} / {week_id}")
+
+    # 點擊人員時的按鍵動作：此時才建立該人員的明細 model
+    def clickedMembers(self, index):
+        if 'members' not in self.mjMembersData:
+            return
+        row = self.mProxy.mapToSource(index).row()
+        member = self.mjMembersData['members'][row]
+        print(member['name'])
+        if member.get('issue') is None:
+            # 精簡格式與快照只先載入週總計，明細此時才讀取 (快照的明細檔見 details)
+            path = self.mjMembersData.get('details') or workhour_paths(self.mDepartment)[1]
+            member['issue'] = load_member_issues(member['member_idx'], path)
+        self.showMemberIssues(member)
+        found = self.mTrendMemberBox.findData(member['name'])
+        if found >= 0:
+            self.mTrendMemberBox.setCurrentIndex(found)
+
+    def showMemberIssues(self, member):
+        self.mMemberName = member['name']
+        old = self.mIssueView.model()
+        self.mIssueView.setModel(build_issue_model(member, self.mjMembersData['week'], self.mIssueView))
+        if old is not None:
+            old.deleteLater()
+        self.mIssueView.expandAll()
+        for col in range(self.mIssueView.model().columnCount()):
+            self.mIssueView.resizeColumnToContents(col)
+        self.mIssueDock.setWindowTitle(f"人員明細：{member['name']}")
+
+    # What-if 模擬：以本地 tasks 調整子項目 (人員明細中雙擊)，只重算受影響人員的週工時
+    def initScenario(self):
+        self.mScenarioButton = QPushButton("模擬調整", self)
+        self.mScenarioButton.setCheckable(True)
+        self.mScenarioButton.toggled.connect(self.toggleScenario)
+        self.mExportButton = QPushButton("匯出調整", self)
+        self.mExportButton.setEnabled(False)
+        self.mExportButton.clicked.connect(self.exportScenario)
+        self.statusBar().addPermanentWidget(self.mScenarioButton)
+        self.statusBar().addPermanentWidget(self.mExportButton)
+        self.mIssueView.doubleClicked.connect(self.editSubIssue)
+
+    def toggleScenario(self, checked):
+        if checked:
+            import app_init
+            try:
+                scenario = app_init.start_scenario(self.mDepartment)
+            except (OSError, ValueError, KeyError) as e:
+                QMessageBox.warning(self, "提示", f"無法讀取本地 tasks：{e}")
+                self.setScenarioChecked(False)
+                return
+            self.mScenario = scenario
+            self.showWorkhour(scenario.result())
+            self.statusBar().showMessage("模擬中：於人員明細雙擊子項目以調整人員、日期或工時")
+        else:
+            if self.mScenario is not None and self.mScenario.overrides:
+                answer = QMessageBox.question(self, "結束模擬", f"放棄 {len(self.mScenario.overrides)} 個子項目的調整？")
+                if answer != QMessageBox.Yes:
+                    self.setScenarioChecked(True)
+                    return
+            self.mScenario = None
+            if self.mDepartment in self.mResults:
+                self.showWorkhour(self.mResults[self.mDepartment])
+            self.statusBar().clearMessage()
+        # 模擬中不更新資料、不切換部門
+        self.ui.pbGenRefreshData.setEnabled(not checked)
+        self.mDepartmentBox.setEnabled(not checked)
+        self.mExportButton.setEnabled(False)
+
+    def setScenarioChecked(self, checked):
+        self.mScenarioButton.blockSignals(True)
+        self.mScenarioButton.setChecked(checked)
+        self.mScenarioButton.blockSignals(False)
+
+    def editSubIssue(self, index):
+        if self.mScenario is None or not index.parent().isValid():
+            return
+        sid = index.sibling(index.row(), 0).data()
+        if sid not in self.mScenario.tasks:
+            return
+        dialog = ScenarioDialog(self.mScenario.task(sid), self.mScenario.names, self)
+        result = dialog.exec_()
+        try:
+            started = time.perf_counter()
+            if result == ScenarioDialog.Reverted:
+                affected = self.mScenario.revert(sid)
+            elif result == QDialog.Accepted:
+                affected = self.mScenario.update(sid, **dialog.values())
+            else:
+                return
+        except ValueError as e:
+            QMessageBox.warning(self, "提示", str(e))
+            return
+        self.applyScenario(affected, time.perf_counter() - started)
+
+    def applyScenario(self, affected, elapsed):
+        scenario = self.mScenario
+        self.mjMembersData = scenario.result()
+        if self.mModel.rowCount() < len(scenario.names):
+            # 指派給新人員：新增列
+            self.mModel.set_workhour(self.mjMembersData)
+        else:
+            for name in affected:
+                self.mModel.update_row(scenario.rows[name], scenario.week_hours(name))
+        if self.mMemberName in scenario.members:
+            self.showMemberIssues(scenario.members[self.mMemberName])
+        self.mExportButton.setEnabled(bool(scenario.overrides))
+        self.statusBar().showMessage(f"模擬中：{len(scenario.overrides)} 個子項目已調整；重算 "
+                                     f"{'、'.join(affected) or '無'} ({elapsed * 1000:.1f} ms)")
+
+    def exportScenario(self):
+        path, _ = QFileDialog.getSaveFileName(self, "匯出調整", "scenario_changes.csv", "CSV (*.csv);;JSON (*.json)")
+        if not path:
+            return
+        try:
+            self.mScenario.export_changes(path)
+        except OSError as e:
+            QMessageBox.warning(self, "提示", f"匯出失敗：{e}")
+
+
+# ---------- What-if 子項目調整對話框 ----------
+class ScenarioDialog(QDialog):
+    """調整單一子項目的人員、Target Start/End 與工時；只回傳有變更的欄位"""
+    Reverted = 2
+
+    def __init__(self, task, names, parent=None):
+        super().__init__(parent)
+        self.task = task
+        self.setWindowTitle(f"調整 {task['Issue']}")
+        self.mAssignee = QComboBox(self)
+        self.mAssignee.setEditable(True)
+        self.mAssignee.addItems(sorted(str(n) for n in names))
+        self.mAssignee.setCurrentText(str(task['Assignee']))
+        self.mStart = QLineEdit(task['Target Start'], self)
+        self.mEnd = QLineEdit(task['Target End'], self)
+        for edit in (self.mStart, self.mEnd):
+            edit.setPlaceholderText("YYYYMMDD")
+        self.mManhour = QDoubleSpinBox(self)
+        self.mManhour.setRange(0, 10000)
+        self.mManhour.setDecimals(2)
+        self.mManhour.setSingleStep(0.5)
+        self.mManhour.setValue(0 if task['Man-hour'] == 'NA' else float(task['Man-hour']))
+        self.mInitialManhour = self.mManhour.value()
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel | QDialogButtonBox.Reset, self)
+        buttons.button(QDialogButtonBox.Reset).setText("還原")
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        buttons.button(QDialogButtonBox.Reset).clicked.connect(lambda: self.done(self.Reverted))
+
+        layout = QFormLayout(self)
+        layout.addRow(QLabel(task['Summary'], self))
+        layout.addRow("人員", self.mAssignee)
+        layout.addRow("Target Start", self.mStart)
+        layout.addRow("Target End", self.mEnd)
+        layout.addRow("工時", self.mManhour)
+        layout.addRow(buttons)
+
+    def values(self):
+        values = {}
+        assignee = self.mAssignee.currentText().strip()
+        if assignee and assignee != str(self.task['Assignee']):
+            values['assignee'] = assignee
+        for key, edit, field in (('start', self.mStart, 'Target Start'), ('end', self.mEnd, 'Target End')):
+            text = edit.text().strip()
+            if text and text != self.task[field]:
+                values[key] = text
+        if self.mManhour.value() != self.mInitialManhour:
+            values['manhour'] = self.mManhour.value()
+        return values
 
 
 if __name__ == '__main__':
@@ -0,0 +1,228 @@
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+from logging.handlers import RotatingFileHandler
+
+METRICS_DIR = './logs'
+METRICS_LOG = 'refresh_metrics.log'
+
+_active = None
+_last = None
+_logger = None
+
+
+# ---------- 單次更新的量測資料 ----------
+class RefreshMetrics:
+    """記錄各階段 span 耗時、計數器與延遲分布；可由多個 thread 同時寫入"""
+
+    def __init__(self, label='refresh'):
+        self.label = label
+        self.started = datetime.now()
+        self.status = 'running'
+        self.total = None
+        self.stages = {}        # 階段名稱 -> 累計秒數 (依第一次出現順序)
+        self.counters = {}
+        self.histograms = {}    # 名稱 -> 觀測值 list
+        self.artifacts = {}     # profile 輸出檔等
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_time(self, name, seconds):
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def observe(self, name, value):
+        with self._lock:
+            self.histograms.setdefault(name, []).append(value)
+
+    def finish(self, status):
+        self.status = status
+        self.total = time.perf_counter() - self._t0
+
+    def summary(self):
+        with self._lock:
+            return {
+                'label': self.label,
+                'started': self.started.isoformat(timespec='seconds'),
+                'status': self.status,
+                'total': round(self.total if self.total is not None else time.perf_counter() - self._t0, 4),
+                'stages': {k: round(v, 4) for k, v in self.stages.items()},
+                'counters': dict(self.counters),
+                'histograms': {k: histogram_summary(v) for k, v in self.histograms.items()},
+                'artifacts': dict(self.artifacts),
+            }
+
+    def format_breakdown(self):
+        """GUI/CLI 顯示用的文字明細"""
+        s = self.summary()
+        lines = [f"{s['started']}  {s['status']}  總計 {s['total']:.2f}s"]
+        for name, secs in s['stages'].items():
+            share = secs * 100 / s['total'] if s['total'] else 0
+            lines.append(f"  {name:<22}{secs:>9.3f}s {share:>5.1f}%")
+        if s['counters']:
+            lines.append('計數：' + ', '.join(f"{k}={v}" for k, v in s['counters'].items()))
+        for name, h in s['histograms'].items():
+            lines.append(f"{name}：n={h['count']} p50={h['p50']:.3f} p90={h['p90']:.3f} "
+                         f"p99={h['p99']:.3f} max={h['max']:.3f}")
+        for name, path in s['artifacts'].items():
+            lines.append(f"{name}：{path}")
+        return '\n'.join(lines)
+
+
+def histogram_summary(values):
+    ordered = sorted(values)
+    n = len(ordered)
+
+    def pct(p):
+        return ordered[min(n - 1, int(p * n))]
+    return {'count': n, 'sum': round(sum(ordered), 4), 'min': ordered[0], 'p50': pct(0.5),
+            'p90': pct(0.9), 'p99': pct(0.99), 'max': ordered[-1]}
+
+
+# ---------- 目前執行中的更新 (未開始量測時為 no-op) ----------
+@contextmanager
+def span(name):
+    metrics = _active
+    if metrics is None:
+        yield
+        return
+    with metrics.span(name):
+        yield
+
+
+def timed(name):
+    """函式層級的 span decorator"""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def add_time(name, seconds):
+    metrics = _active
+    if metrics is not None:
+        metrics.add_time(name, seconds)
+
+
+def count(name, n=1):
+    metrics = _active
+    if metrics is not None:
+        metrics.count(name, n)
+
+
+def observe(name, value):
+    metrics = _active
+    if metrics is not None:
+        metrics.observe(name, value)
+
+
+def count_result(result):
+    """workhour 結果的人員數與區間內子項目數"""
+    if _active is None or not result:
+        return
+    members = result.get('members', [])
+    count('members', len(members))
+    count('sub_issues_in_window', sum(len(b['sub_issue']) for m in members for b in (m.get('issue') or [])))
+
+
+def last_refresh():
+    """最近一次完成 (含取消/失敗) 的 RefreshMetrics；尚未執行過時為 None"""
+    return _last
+
+
+@contextmanager
+def refresh_run(label='refresh', profile='off', metrics_dir=METRICS_DIR):
+    """量測一次更新：結束時寫入 rotating log；profile 為 cprofile/tracemalloc 時另存分析檔"""
+    global _active, _last
+    metrics = RefreshMetrics(label)
+    _active = metrics
+    profiler = _start_profile(profile)
+    status = 'failed'
+    try:
+        yield metrics
+        status = 'ok'
+    except BaseException as e:
+        from app_fetcher import RefreshCancelled
+        if isinstance(e, RefreshCancelled):
+            status = 'cancelled'
+        raise
+    finally:
+        _stop_profile(profile, profiler, metrics, metrics_dir)
+        metrics.finish(status)
+        _active = None
+        _last = metrics
+        _write_log(metrics, metrics_dir)
+
+
+def _start_profile(profile):
+    if profile == 'cprofile':
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+    if profile == 'tracemalloc':
+        import tracemalloc
+        tracemalloc.start(10)
+    return None
+
+
+def _stop_profile(profile, profiler, metrics, metrics_dir):
+    if profile not in ('cprofile', 'tracemalloc'):
+        return
+    stamp = metrics.started.strftime('%Y%m%d_%H%M%S')
+    os.makedirs(metrics_dir, exist_ok=True)
+    if profile == 'cprofile':
+        # 只涵蓋執行更新的 thread；分頁下載的 worker thread 由 jira.page_seconds 觀測
+        profiler.disable()
+        path = os.path.join(metrics_dir, f'refresh_{stamp}.prof')
+        profiler.dump_stats(path)
+        metrics.artifacts['cprofile'] = path
+        return
+    import tracemalloc
+    snapshot = tracemalloc.take_snapshot()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    metrics.counters['memory_peak_bytes'] = peak
+    path = os.path.join(metrics_dir, f'refresh_{stamp}.tracemalloc.txt')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f'current={current} peak={peak}\n')
+        for stat in snapshot.statistics('lineno')[:30]:
+            f.write(f'{stat}\n')
+    metrics.artifacts['tracemalloc'] = path
+
+
+def _write_log(metrics, metrics_dir):
+    global _logger
+    try:
+        if _logger is None:
+            os.makedirs(metrics_dir, exist_ok=True)
+            logger = logging.getLogger('manpower.metrics')
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            handler = RotatingFileHandler(os.path.join(metrics_dir, METRICS_LOG), maxBytes=1_000_000,
+                                          backupCount=5, encoding='utf-8')
+            logger.addHandler(handler)
+            _logger = logger
+        _logger.info(json.dumps(metrics.summary(), ensure_ascii=False))
+    except OSError as e:
+        print(f"⚠️ 無法寫入量測紀錄：{e}")
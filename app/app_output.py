@@ -0,0 +1,131 @@
+import json
+import os
+import sqlite3
+
+WORKHOUR_JSON = 'workhour.json'
+WORKHOUR_DB = 'workhour.db'
+
+
+# ---------- workhour 精簡格式 (SQLite) ----------
+# 週總計與明細分表存放；重複的字串 (人員、主項目名稱) 以 strings 表 intern，
+# GUI 先只讀 members/member_weeks，點選人員時再讀 blocks/subs。
+SCHEMA = '''
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE strings (id INTEGER PRIMARY KEY, text TEXT UNIQUE);
+CREATE TABLE weeks (idx INTEGER PRIMARY KEY, data TEXT NOT NULL);
+CREATE TABLE members (idx INTEGER PRIMARY KEY, name_id INTEGER NOT NULL, hours TEXT NOT NULL);
+CREATE TABLE blocks (member_idx INTEGER NOT NULL, block_idx INTEGER NOT NULL,
+                     main_issue_id INTEGER NOT NULL, main_issue_name_id INTEGER NOT NULL,
+                     PRIMARY KEY (member_idx, block_idx));
+CREATE TABLE subs (member_idx INTEGER NOT NULL, block_idx INTEGER NOT NULL, seq INTEGER NOT NULL,
+                   sub_issue_id TEXT, sub_issue_name TEXT, manpower REAL, work_day INTEGER,
+                   preday_hours REAL, week_days TEXT, week_hours TEXT, resolutiondate TEXT,
+                   PRIMARY KEY (member_idx, block_idx, seq));
+'''
+SUB_FIXED = ('sub_issue_id', 'sub_issue_name', 'sub_issue_manpower', 'sub_issue_work_day', 'sub_issue_preday_hours')
+
+
+def workhour_paths(department=None):
+    """(json, sqlite) 輸出路徑；department 為 None 時為單一部門或跨部門合併結果"""
+    if department is None:
+        return WORKHOUR_JSON, WORKHOUR_DB
+    return f'workhour_{department}.json', f'workhour_{department}.db'
+
+
+def _compact(values):
+    return json.dumps(values, separators=(',', ':'))
+
+
+def write_workhour_db(result, path=WORKHOUR_DB):
+    """寫入暫存檔後再替換，讀取端不會看到寫一半的檔案"""
+    tmp = path + '.tmp'
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    conn = sqlite3.connect(tmp)
+    try:
+        conn.executescript(SCHEMA)
+        strings = {}
+
+        def intern(text):
+            key = '' if text is None else str(text)
+            if key not in strings:
+                strings[key] = len(strings)
+            return strings[key]
+
+        nweeks = len(result['week'])
+        hour_keys = [f'week_{k+1}_hours' for k in range(nweeks)]
+        day_keys = [f'sub_issue_work_day_week{k+1}' for k in range(nweeks)]
+        members, blocks, subs = [], [], []
+        for mi, member in enumerate(result['members']):
+            members.append((mi, intern(member['name']), _compact([member[k] for k in hour_keys])))
+            for bi, block in enumerate(member['issue']):
+                blocks.append((mi, bi, intern(block['main_issue']), intern(block['main_issue_name'])))
+                for si, rec in enumerate(block['sub_issue']):
+                    subs.append((mi, bi, si) + tuple(rec[k] for k in SUB_FIXED) + (
+                        _compact([rec[k] for k in day_keys]), _compact([rec[k] for k in hour_keys]),
+                        rec['resolutiondate']))
+
+        with conn:
+            conn.executemany('INSERT INTO meta VALUES (?, ?)', [('format_version', '1'), ('weeks', str(nweeks))])
+            conn.executemany('INSERT INTO weeks VALUES (?, ?)',
+                             [(i, json.dumps(w, ensure_ascii=False)) for i, w in enumerate(result['week'])])
+            conn.executemany('INSERT INTO strings VALUES (?, ?)', [(i, s) for s, i in strings.items()])
+            conn.executemany('INSERT INTO members VALUES (?, ?, ?)', members)
+            conn.executemany('INSERT INTO blocks VALUES (?, ?, ?, ?)', blocks)
+            conn.executemany('INSERT INTO subs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', subs)
+    finally:
+        conn.close()
+    os.replace(tmp, path)
+    print(f'✅ {path} 產生完成')
+
+
+def _connect(path):
+    return sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+
+
+def load_workhour_summary(path=WORKHOUR_DB):
+    """只讀週資訊與每位人員的週總計；member['issue'] 為 None，需要時再以 load_member_issues 讀取"""
+    conn = _connect(path)
+    try:
+        weeks = [json.loads(r[0]) for r in conn.execute('SELECT data FROM weeks ORDER BY idx')]
+        hour_keys = [f'week_{k+1}_hours' for k in range(len(weeks))]
+        members = []
+        for idx, name, hours in conn.execute(
+                'SELECT m.idx, s.text, m.hours FROM members m JOIN strings s ON s.id = m.name_id ORDER BY m.idx'):
+            member = {'name': name, 'issue': None, 'member_idx': idx}
+            member.update(zip(hour_keys, json.loads(hours)))
+            members.append(member)
+        return {'week': weeks, 'members': members}
+    finally:
+        conn.close()
+
+
+def load_member_issues(member_idx, path=WORKHOUR_DB):
+    conn = _connect(path)
+    try:
+        nweeks = int(conn.execute("SELECT value FROM meta WHERE key = 'weeks'").fetchone()[0])
+        hour_keys = [f'week_{k+1}_hours' for k in range(nweeks)]
+        day_keys = [f'sub_issue_work_day_week{k+1}' for k in range(nweeks)]
+        blocks = []
+        for bi, main_issue, main_name in conn.execute(
+                'SELECT b.block_idx, s1.text, s2.text FROM blocks b '
+                'JOIN strings s1 ON s1.id = b.main_issue_id JOIN strings s2 ON s2.id = b.main_issue_name_id '
+                'WHERE b.member_idx = ? ORDER BY b.block_idx', (member_idx,)):
+            blocks.append({'main_issue': main_issue, 'main_issue_name': main_name, 'sub_issue': []})
+        for row in conn.execute('SELECT * FROM subs WHERE member_idx = ? ORDER BY block_idx, seq', (member_idx,)):
+            rec = dict(zip(SUB_FIXED, row[3:8]))
+            rec.update(zip(day_keys, json.loads(row[8])))
+            rec.update(zip(hour_keys, json.loads(row[9])))
+            rec['resolutiondate'] = row[10]
+            blocks[row[1]]['sub_issue'].append(rec)
+        return blocks
+    finally:
+        conn.close()
+
+
+def load_workhour(path=WORKHOUR_DB):
+    """完整還原為與 workhour.json 相同的結構"""
+    data = load_workhour_summary(path)
+    for member in data['members']:
+        member['issue'] = load_member_issues(member.pop('member_idx'), path)
+    return data
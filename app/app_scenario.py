@@ -0,0 +1,181 @@
+import csv
+import json
+from datetime import datetime
+
+from app_workhour import WorkhourAccumulator, compute_sub_issue, member_totals, DEFAULT_HORIZON
+
+# 可調整的欄位 -> JIRA 欄位 (見 app_init.build_task)
+EDITABLE_FIELDS = {
+    'Assignee': 'assignee',
+    'Target Start': 'customfield_10109',
+    'Target End': 'customfield_10110',
+    'Man-hour': 'customfield_12046',
+}
+
+
+def _same_value(field, a, b):
+    # Man-hour 原始值可能是字串或 'NA'，以數值比較
+    if field == 'Man-hour':
+        return (0.0 if a == 'NA' else float(a)) == (0.0 if b == 'NA' else float(b))
+    return a == b
+
+
+# ---------- What-if 調整 ----------
+class Scenario:
+    """以已載入的 tasks 為基準的模擬調整 (重新指派、改期、調整工時)，不改動 JIRA 與原始 tasks。
+    每次調整只重算該子項目與調整前/後的人員週工時；結果格式與 WorkhourAccumulator 相同，
+    新出現的人員附加在最後，調整後已無子項目的人員保留 (週工時為 0)，表格列位置不變。"""
+
+    def __init__(self, tasks, annual_data, now=None, horizon=DEFAULT_HORIZON):
+        # 沿用累加器的日曆索引、週次與週區間
+        self.base = WorkhourAccumulator(annual_data, now, horizon)
+        self.weeks = self.base.weeks
+        self.keys = [f'week_{k+1}_hours' for k in range(len(self.weeks))]
+        self.mains = {}
+        self.tasks = {}         # Sub-Manpower id -> 原始 task
+        self.order = {}         # Sub-Manpower id -> 在 tasks 中的順序 (決定主項目/子項目排列)
+        self.overrides = {}     # Sub-Manpower id -> {欄位: 調整後的值}
+        self.recs = {}          # Sub-Manpower id -> 計算結果 (工時未填為 None)
+        self.subs = {}          # 人員 -> 區間內子項目 id (依 order 排序)
+        self.names = []         # 結果中的人員順序
+        self.rows = {}          # 人員 -> 列序號
+        self.members = {}       # 人員 -> member dict
+        for i, t in enumerate(tasks):
+            if t['IssueType'] == 'Manpower':
+                self.mains[t['Issue']] = t['Summary']
+            elif t['IssueType'] == 'Sub-Manpower':
+                self.tasks[t['Issue']] = t
+                self.order[t['Issue']] = i
+                if self._in_window(t):
+                    self._add_member(t['Assignee'])
+                    self.subs[t['Assignee']].append(t['Issue'])
+                    self.recs[t['Issue']] = self._compute(t)
+        for name in self.names:
+            self._rebuild(name)
+
+    def _in_window(self, t):
+        return bool(self.weeks) and not (t['Target Start'] > self.base.wne or t['Target End'] < self.base.w1s)
+
+    def _compute(self, t):
+        return compute_sub_issue(t, self.base.calendar, self.weeks, self.base.now, self.base.week_bounds)
+
+    def _add_member(self, name):
+        if name not in self.rows:
+            self.rows[name] = len(self.names)
+            self.names.append(name)
+            self.subs[name] = []
+
+    def _rebuild(self, name):
+        blocks = {}
+        for sid in self.subs[name]:
+            lst = blocks.setdefault(self.task(sid)['Parent'], [])
+            if self.recs[sid] is not None:
+                lst.append(self.recs[sid])
+        member = {'name': name, 'issue': [
+            {'main_issue': mid, 'main_issue_name': self.mains.get(mid, ''), 'sub_issue': lst}
+            for mid, lst in blocks.items()]}
+        member.update(member_totals(member['issue'], self.keys))
+        self.members[name] = member
+
+    def task(self, sid):
+        """套用調整後的 task"""
+        t = self.tasks[sid]
+        override = self.overrides.get(sid)
+        return dict(t, **override) if override else t
+
+    def update(self, sid, assignee=None, start=None, end=None, manhour=None):
+        """調整子項目 (未指定的欄位不變)；回傳週工時有重算的人員"""
+        if sid not in self.tasks:
+            raise KeyError(f"{sid} 不是 Sub-Manpower")
+        changes = {'Assignee': assignee, 'Target Start': start, 'Target End': end,
+                   'Man-hour': None if manhour is None else float(manhour)}
+        for field in ('Target Start', 'Target End'):
+            value = changes[field]
+            if value is not None and not (len(value) == 8 and value.isdigit()):
+                raise ValueError(f"{field} 需為 YYYYMMDD：{value}")
+        old = self.task(sid)
+        new = dict(old, **{k: v for k, v in changes.items() if v is not None})
+        if new['Target Start'].isdigit() and new['Target End'].isdigit() and new['Target Start'] > new['Target End']:
+            raise ValueError(f"Target Start 晚於 Target End：{new['Target Start']} > {new['Target End']}")
+        return self._apply(sid, old, new)
+
+    def revert(self, sid):
+        """取消單一子項目的調整"""
+        return self._apply(sid, self.task(sid), self.tasks[sid])
+
+    def reset(self):
+        affected = []
+        for sid in list(self.overrides):
+            affected.extend(self.revert(sid))
+        return list(dict.fromkeys(affected))
+
+    def _apply(self, sid, old, new):
+        base = self.tasks[sid]
+        override = {k: new[k] for k in EDITABLE_FIELDS if not _same_value(k, new[k], base[k])}
+        if override:
+            self.overrides[sid] = override
+        else:
+            self.overrides.pop(sid, None)
+
+        affected = []
+        if self._in_window(old):
+            self.subs[old['Assignee']].remove(sid)
+            affected.append(old['Assignee'])
+        self.recs.pop(sid, None)
+        if self._in_window(new):
+            self._add_member(new['Assignee'])
+            subs = self.subs[new['Assignee']]
+            subs.append(sid)
+            subs.sort(key=self.order.__getitem__)
+            self.recs[sid] = self._compute(new)
+            affected.append(new['Assignee'])
+        affected = list(dict.fromkeys(affected))
+        for name in affected:
+            self._rebuild(name)
+        return affected
+
+    def result(self):
+        return {'week': self.weeks, 'members': [self.members[name] for name in self.names]}
+
+    def week_hours(self, name):
+        return [self.members[name][key] for key in self.keys]
+
+    # ---------- 匯出 ----------
+    def changes(self):
+        """建議的 JIRA 變更，每個欄位一筆 (依 tasks 順序)"""
+        rows = []
+        for sid in sorted(self.overrides, key=self.order.__getitem__):
+            t = self.tasks[sid]
+            for field, value in self.overrides[sid].items():
+                rows.append({'issue': sid, 'summary': t['Summary'], 'field': field,
+                             'jira_field': EDITABLE_FIELDS[field], 'from': t[field], 'to': value})
+        return rows
+
+    def jira_updates(self):
+        """可直接用於 PUT /rest/api/2/issue/{key} 的 fields；assignee 只有顯示名稱，需對應為帳號"""
+        updates = []
+        for sid in sorted(self.overrides, key=self.order.__getitem__):
+            fields = {}
+            for field, value in self.overrides[sid].items():
+                if field == 'Assignee':
+                    fields['assignee'] = {'displayName': value}
+                elif field == 'Man-hour':
+                    fields[EDITABLE_FIELDS[field]] = value
+                else:
+                    fields[EDITABLE_FIELDS[field]] = f'{value[:4]}-{value[4:6]}-{value[6:]}'
+            updates.append({'key': sid, 'fields': fields})
+        return updates
+
+    def export_changes(self, path):
+        """.csv：每個欄位變更一列 (Excel 可直接開啟)；其他副檔名：JSON (含 jira_updates)"""
+        if path.lower().endswith('.csv'):
+            with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=['issue', 'summary', 'field', 'jira_field', 'from', 'to'])
+                writer.writeheader()
+                writer.writerows(self.changes())
+        else:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({'created': datetime.now().isoformat(timespec='seconds'), 'changes': self.changes(),
+                           'jira_updates': self.jira_updates()}, f, ensure_ascii=False, indent=2)
+        print(f"📤 {path} 匯出 {len(self.overrides)} 個子項目的調整")
+        return path
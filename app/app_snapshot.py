@@ -0,0 +1,124 @@
+import json
+import os
+from datetime import datetime
+
+from app_output import write_workhour_db
+
+SNAPSHOT_DIR = './snapshots'
+SNAPSHOT_KEEP = 10
+LATEST = 'latest.json'
+STAMP_FORMAT = '%Y%m%d_%H%M%S'
+
+
+# ---------- 版本化結果快照 ----------
+# 每次成功更新寫入 workhour_{時間}.json，再以 latest.json 指向最新版本；
+# 兩者皆先寫暫存檔再 os.replace，讀取端不會看到寫一半的檔案。更新失敗時不動 latest.json。
+# 快照 json 只存週資訊與人員週總計，明細另存 workhour_{時間}.db (各部門 workhour_{時間}.{部門}.db)，
+# GUI 開啟時只讀總計，點選人員時再以 load_member_issues 讀取明細。
+def _atomic_write_json(path, data, **kwargs):
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, **kwargs)
+    os.replace(tmp, path)
+
+
+def _details_name(name, department=None):
+    base = name[:-len('.json')]
+    return f'{base}.db' if department is None else f'{base}.{department}.db'
+
+
+def _summary(result, directory, details):
+    """週總計 + 明細檔 (details，相對於快照目錄)；member['issue'] 為 None，與 load_workhour_summary 相同"""
+    write_workhour_db(result, os.path.join(directory, details))
+    hour_keys = [f'week_{k+1}_hours' for k in range(len(result['week']))]
+    members = []
+    for idx, member in enumerate(result['members']):
+        summary = {'name': member['name'], 'issue': None, 'member_idx': idx}
+        summary.update((k, member[k]) for k in hour_keys)
+        members.append(summary)
+    return {'week': result['week'], 'members': members, 'details': details}
+
+
+def write_snapshot(result, directory=SNAPSHOT_DIR, keep=SNAPSHOT_KEEP, **meta):
+    """寫入新版本快照並更新 latest.json；回傳快照路徑"""
+    os.makedirs(directory, exist_ok=True)
+    created = datetime.now()
+    name = f'workhour_{created.strftime(STAMP_FORMAT)}.json'
+    # 同一秒內重複寫入時加上序號
+    seq = 1
+    while os.path.exists(os.path.join(directory, name)):
+        seq += 1
+        name = f'workhour_{created.strftime(STAMP_FORMAT)}_{seq}.json'
+    info = dict(meta, file=name, created=created.isoformat(timespec='seconds'))
+    summary = _summary(result, directory, _details_name(name))
+    departments = result.get('departments')
+    if departments:
+        summary['departments'] = {key: _summary(dept, directory, _details_name(name, key))
+                                  for key, dept in departments.items()}
+    _atomic_write_json(os.path.join(directory, name), {'snapshot': info, 'result': summary},
+                       separators=(',', ':'))
+    _atomic_write_json(os.path.join(directory, LATEST), info, indent=2)
+    prune_snapshots(directory, keep)
+    print(f"💾 快照 {name} 寫入完成")
+    return os.path.join(directory, name)
+
+
+def list_snapshots(directory=SNAPSHOT_DIR):
+    """由舊到新的快照檔名"""
+    if not os.path.isdir(directory):
+        return []
+    return sorted(n for n in os.listdir(directory) if n.startswith('workhour_') and n.endswith('.json'))
+
+
+def prune_snapshots(directory=SNAPSHOT_DIR, keep=SNAPSHOT_KEEP):
+    names = list_snapshots(directory)
+    latest = latest_info(directory)
+    current = latest['file'] if latest else None
+    expired = [name for name in names[:max(0, len(names) - keep)] if name != current]
+    for name in expired:
+        os.remove(os.path.join(directory, name))
+        # 該版本的明細檔
+        prefix = name[:-len('.json')] + '.'
+        for other in os.listdir(directory):
+            if other.startswith(prefix) and other.endswith('.db'):
+                os.remove(os.path.join(directory, other))
+
+
+def latest_info(directory=SNAPSHOT_DIR):
+    """latest.json 的內容 (file, created 與寫入時附帶的資訊)；尚無快照時為 None"""
+    try:
+        with open(os.path.join(directory, LATEST), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def load_latest(directory=SNAPSHOT_DIR):
+    """回傳 (info, result)；尚無快照時為 (None, None)。
+    result 只含週總計，result['details'] (各部門結果亦同) 為明細檔路徑，供 load_member_issues 讀取"""
+    info = latest_info(directory)
+    if info is None:
+        return None, None
+    with open(os.path.join(directory, info['file']), 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    result = data['result']
+    for part in [result] + list((result.get('departments') or {}).values()):
+        if part.get('details'):
+            part['details'] = os.path.join(directory, part['details'])
+    return data['snapshot'], result
+
+
+def snapshot_age(info, now=None):
+    """快照距今秒數"""
+    created = datetime.fromisoformat(info['created'])
+    return ((now or datetime.now()) - created).total_seconds()
+
+
+def format_age(seconds):
+    if seconds < 60:
+        return "剛剛"
+    if seconds < 3600:
+        return f"{int(seconds // 60)} 分鐘前"
+    if seconds < 86400:
+        return f"{int(seconds // 3600)} 小時前"
+    return f"{int(seconds // 86400)} 天前"
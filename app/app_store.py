@@ -0,0 +1,115 @@
+import json
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+
+STORE_PATH = './jira_store.db'
+
+
+# ---------- 本地 Issue 儲存 (SQLite) ----------
+class IssueStore:
+    """以 SQLite 保存已同步的 JIRA Issue，並記錄每個專案的最後同步時間"""
+
+    def __init__(self, path=STORE_PATH):
+        # 多部門同時同步時由 SQLite 排隊寫入
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS issues (
+                issue_key TEXT PRIMARY KEY,
+                project TEXT NOT NULL,
+                issue_num INTEGER NOT NULL,
+                issue_type TEXT,
+                data TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_issues_project ON issues(project, issue_num);
+            CREATE TABLE IF NOT EXISTS sync_state (
+                project TEXT PRIMARY KEY,
+                last_sync TEXT
+            );
+        ''')
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # 最後同步時間：已同步 Issue 中最大的 updated (伺服器時間，含時區)
+    def get_last_sync(self, project):
+        row = self.conn.execute('SELECT last_sync FROM sync_state WHERE project = ?', (project,)).fetchone()
+        if not row or not row[0]:
+            return None
+        when = datetime.fromisoformat(row[0])
+        # 舊版記錄的是本機時間 (無時區)
+        return when if when.tzinfo is not None else when.astimezone()
+
+    def set_last_sync(self, project, when):
+        with self.conn:
+            self.conn.execute('INSERT OR REPLACE INTO sync_state (project, last_sync) VALUES (?, ?)',
+                              (project, when.isoformat()))
+
+    def reset(self, project):
+        with self.conn:
+            self.conn.execute('DELETE FROM issues WHERE project = ?', (project,))
+            self.conn.execute('DELETE FROM sync_state WHERE project = ?', (project,))
+
+    # 新增或更新 Issue (task 為 normalize 後的 dict)
+    def upsert(self, project, tasks, replace=False):
+        with self.conn:
+            if replace:
+                self.conn.execute('DELETE FROM issues WHERE project = ?', (project,))
+            return self._insert(project, tasks)
+
+    def _insert(self, project, tasks):
+        rows = [(t['Issue'], project, issue_number(t['Issue']), t['IssueType'],
+                 json.dumps(t, ensure_ascii=False)) for t in tasks]
+        self.conn.executemany(
+            'INSERT OR REPLACE INTO issues (issue_key, project, issue_num, issue_type, data) VALUES (?, ?, ?, ?, ?)',
+            rows)
+        return len(rows)
+
+    def replace_all(self, project, tasks):
+        """完整抓取後整個專案替換 (同一個 transaction)"""
+        return self.upsert(project, tasks, replace=True)
+
+    @contextmanager
+    def replacing(self, project):
+        """串流抓取時逐批替換整個專案：yield 寫入函式 write(tasks)，全部在同一個 transaction，
+        中途失敗或取消時保留原資料"""
+        with self.conn:
+            self.conn.execute('DELETE FROM issues WHERE project = ?', (project,))
+            yield lambda tasks: self._insert(project, tasks)
+
+    def count(self, project):
+        return self.conn.execute('SELECT COUNT(*) FROM issues WHERE project = ?', (project,)).fetchone()[0]
+
+    def keys(self, project):
+        return {r[0] for r in self.conn.execute('SELECT issue_key FROM issues WHERE project = ?', (project,))}
+
+    # 刪除伺服器上已不存在 (刪除或移至其他專案) 的 Issue
+    def delete_missing(self, project, live_keys):
+        stale = self.keys(project) - set(live_keys)
+        with self.conn:
+            self.conn.executemany('DELETE FROM issues WHERE issue_key = ?', [(k,) for k in stale])
+        return stale
+
+    def load_tasks(self, project):
+        return list(self.iter_tasks(project))
+
+    def iter_tasks(self, project):
+        """逐筆讀取，不一次建立整個 list"""
+        cur = self.conn.execute('SELECT data FROM issues WHERE project = ? ORDER BY issue_num', (project,))
+        for (data,) in cur:
+            yield json.loads(data)
+
+
+def issue_number(key):
+    try:
+        return int(key.rsplit('-', 1)[1])
+    except (IndexError, ValueError):
+        return 0
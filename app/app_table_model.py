@@ -0,0 +1,220 @@
+from array import array
+
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QSortFilterProxyModel, QVariant
+from PyQt5.QtGui import QColor, QBrush, QStandardItemModel, QStandardItem
+
+ZH_TITLES = ["本周", "下周", "下下周"]
+OVER_LIMIT_BRUSH = QBrush(QColor(30, 144, 255))    # 超過上限
+UNDER_LIMIT_BRUSH = QBrush(QColor(176, 23, 31))    # 低於下限
+CHANGED_BRUSH = QBrush(QColor(255, 243, 205))      # 工時有變動的更新
+SORT_ROLE = Qt.UserRole
+
+
+def week_title(i, week):
+    title = ZH_TITLES[i] if i < len(ZH_TITLES) else f"第{i+1}周"
+    return f"{title}({week['wh_week_id']})"
+
+
+# ---------- 人員週工時表 ----------
+class MemberHoursModel(QAbstractTableModel):
+    """直接讀取人員 × 週的工時陣列 (row-major array('d'))；上/下限顏色於 data() 中判斷，不建立逐格 item"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.names = []
+        self.headers = []
+        self.hours = array('d')
+        self.uplimits = array('d')
+        self.downlimits = array('d')
+
+    def set_workhour(self, data):
+        weeks = data['week']
+        self.beginResetModel()
+        self.names = [m['name'] for m in data['members']]
+        self.headers = [week_title(i, w) for i, w in enumerate(weeks)]
+        keys = [f'week_{k+1}_hours' for k in range(len(weeks))]
+        self.hours = array('d', (m.get(key, 0) for m in data['members'] for key in keys))
+        # 取得每週的上限/下限工時(預設40/24)
+        self.uplimits = array('d', (w.get('wh_week_uplimit_hours', 40) for w in weeks))
+        self.downlimits = array('d', (w.get('wh_week_downlimit_hours', 24) for w in weeks))
+        self.endResetModel()
+
+    def update_row(self, row, week_hours):
+        """只更新單一人員的週工時 (例如 what-if 調整)"""
+        n = len(self.headers)
+        self.hours[row * n:(row + 1) * n] = array('d', week_hours)
+        self.dataChanged.emit(self.index(row, 0), self.index(row, n - 1))
+
+    def hour(self, row, col):
+        return self.hours[row * len(self.headers) + col]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.names)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return QVariant()
+        h = self.hour(index.row(), index.column())
+        if role == Qt.DisplayRole:
+            return str(round(h, 1))
+        if role == SORT_ROLE:
+            return h
+        if role == Qt.TextAlignmentRole:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        if role == Qt.ForegroundRole:
+            # 動態判斷上/下限
+            col = index.column()
+            if h > self.uplimits[col]:
+                return OVER_LIMIT_BRUSH
+            if h < self.downlimits[col]:
+                return UNDER_LIMIT_BRUSH
+        return QVariant()
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return QVariant()
+        if orientation == Qt.Horizontal:
+            return self.headers[section] if section < len(self.headers) else QVariant()
+        return self.names[section] if section < len(self.names) else QVariant()
+
+
+# ---------- 人員每日負載 (heat strip) ----------
+DAILY_SUMMARY_HEADERS = ["峰值", "超載天數", "首次超載"]
+_HEAT_BRUSHES = [QBrush(QColor(c)) for c in ('#E5F5E0', '#C7E9C0', '#A1D99B', '#74C476', '#41AB5D')]
+_OVER_BRUSHES = [QBrush(QColor(c)) for c in ('#FC9272', '#FB6A4A', '#EF3B2C', '#CB181D')]
+
+
+def heat_brush(hours, limit):
+    """0 不著色；上限內由淺綠漸深，超過上限為紅色 (超出越多越深)"""
+    if hours <= 0:
+        return None
+    if hours <= limit:
+        step = min(4, int(hours * 4 / limit))
+        return _HEAT_BRUSHES[step]
+    return _OVER_BRUSHES[min(3, int((hours - limit) * 4 / limit))]
+
+
+class DailyLoadModel(QAbstractTableModel):
+    """人員 × 工作日的每日工時 (row-major array('d'))；前三欄為峰值/超載天數/首次超載，其後每欄一天以顏色呈現負載"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.names = []
+        self.dates = []
+        self.summary = []
+        self.hours = array('d')
+        self.limit = 8.0
+
+    def set_daily_load(self, load):
+        self.beginResetModel()
+        members = load['members'] if load else []
+        self.names = [m['name'] for m in members]
+        self.dates = load['dates'] if load else []
+        self.limit = load['limit_hours'] if load else 8.0
+        self.summary = [(m['peak_hours'], m['overload_days'], m['first_overload'] or '') for m in members]
+        self.hours = array('d', (h for m in members for h in m['daily']))
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.names)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(DAILY_SUMMARY_HEADERS) + len(self.dates)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return QVariant()
+        row, col = index.row(), index.column() - len(DAILY_SUMMARY_HEADERS)
+        if col < 0:
+            value = self.summary[row][index.column()]
+            if role in (Qt.DisplayRole, SORT_ROLE):
+                return value
+            return QVariant()
+        h = self.hours[row * len(self.dates) + col]
+        if role == SORT_ROLE:
+            return h
+        if role == Qt.BackgroundRole:
+            return heat_brush(h, self.limit) or QVariant()
+        if role == Qt.ToolTipRole:
+            return f"{self.names[row]} {self.dates[col]}：{h} 小時"
+        return QVariant()
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.ToolTipRole and section >= len(DAILY_SUMMARY_HEADERS):
+            return self.dates[section - len(DAILY_SUMMARY_HEADERS)]
+        if role != Qt.DisplayRole:
+            return QVariant()
+        if orientation == Qt.Horizontal:
+            if section < len(DAILY_SUMMARY_HEADERS):
+                return DAILY_SUMMARY_HEADERS[section]
+            date = self.dates[section - len(DAILY_SUMMARY_HEADERS)]
+            return f"{date[4:6]}/{date[6:]}"
+        return self.names[section] if section < len(self.names) else QVariant()
+
+
+class MemberFilterProxyModel(QSortFilterProxyModel):
+    """排序/篩選只維護索引對照，不複製資料"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.name_filter = ''
+        self.setSortRole(SORT_ROLE)
+
+    def setNameFilter(self, text):
+        self.name_filter = text.strip().lower()
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if not self.name_filter:
+            return True
+        return self.name_filter in str(self.sourceModel().names[source_row]).lower()
+
+    def lessThan(self, left, right):
+        return left.data(SORT_ROLE) < right.data(SORT_ROLE)
+
+
+# ---------- 人員主/子項目明細 ----------
+def _item(value):
+    item = QStandardItem(str(value))
+    item.setEditable(False)
+    return item
+
+
+def build_issue_model(member, weeks, parent=None):
+    """點選人員時才建立該人員的 main_issue / sub_issue 樹狀明細"""
+    keys = [f'week_{k+1}_hours' for k in range(len(weeks))]
+    model = QStandardItemModel(parent)
+    model.setHorizontalHeaderLabels(['Issue', '名稱', '工時', '工作天'] + [week_title(i, w) for i, w in enumerate(weeks)])
+    for block in member.get('issue', []):
+        subs = block.get('sub_issue', [])
+        manpower = round(sum(si.get('sub_issue_manpower', 0) for si in subs), 1)
+        totals = [round(sum(si.get(key, 0) for si in subs), 1) for key in keys]
+        main_row = [_item(block['main_issue']), _item(block.get('main_issue_name', '')), _item(manpower), _item('')]
+        main_row += [_item(t) for t in totals]
+        for si in subs:
+            main_row[0].appendRow(
+                [_item(si['sub_issue_id']), _item(si.get('sub_issue_name', '')),
+                 _item(si.get('sub_issue_manpower', 0)), _item(si.get('sub_issue_work_day', 0))]
+                + [_item(si.get(key, 0)) for key in keys])
+        model.appendRow(main_row)
+    return model
+
+
+# ---------- 週工時歷史趨勢 ----------
+def build_trend_model(trend, parent=None):
+    """[(更新時間, 工時)] 轉為表格：每次更新的工時與相對上一次的變化"""
+    model = QStandardItemModel(parent)
+    model.setHorizontalHeaderLabels(['更新時間', '工時', '變化'])
+    previous = None
+    for taken, hours in trend:
+        delta = '' if previous is None else f"{hours - previous:+.1f}"
+        row = [_item(taken.replace('T', ' ')), _item(hours), _item(delta)]
+        if previous is not None and hours != previous:
+            for item in row:
+                item.setBackground(CHANGED_BRUSH)
+        model.appendRow(row)
+        previous = hours
+    return model
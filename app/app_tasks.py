@@ -0,0 +1,90 @@
+import json
+import re
+import sys
+
+MANPOWER, SUB_MANPOWER, OTHER = 0, 1, 2
+ISSUE_KINDS = {'Manpower': MANPOWER, 'Sub-Manpower': SUB_MANPOWER}
+# 'NA' 與任何 'YYYYMMDD' 比較都較大，以最大值保留相同的比較語意
+DATE_NA = 99999999
+READ_CHUNK = 1 << 16
+_SEPARATORS = re.compile(r'[\s,]*')
+
+
+def date_ord(value):
+    """'YYYYMMDD' → 整數；比較結果與原本的字串比較相同"""
+    if isinstance(value, str) and len(value) == 8 and value.isdigit():
+        return int(value)
+    return DATE_NA if str(value) > '99999999' else 0
+
+
+def parse_manhour_value(value):
+    """Man-hour 欄位值轉 float；0 與 0.1 視為未填，回傳 None"""
+    mh = float(value) if value != 'NA' else 0
+    if mh == 0.1 or mh == 0:
+        return None
+    return mh
+
+
+# ---------- 精簡 task record ----------
+class TaskRecord:
+    """只保留計算工時需要的欄位：日期為整數、工時已轉 float、人員/主項目字串 intern 共用"""
+    __slots__ = ('issue', 'kind', 'summary', 'assignee', 'parent', 'start', 'end', 'manhour', 'resolutiondate')
+
+    def __init__(self, issue, kind, summary, assignee, parent, start, end, manhour, resolutiondate):
+        self.issue = issue
+        self.kind = kind
+        self.summary = summary
+        self.assignee = assignee
+        self.parent = parent
+        self.start = start
+        self.end = end
+        self.manhour = manhour
+        self.resolutiondate = resolutiondate
+
+    @classmethod
+    def from_task(cls, t):
+        kind = ISSUE_KINDS.get(t['IssueType'], OTHER)
+        if kind == SUB_MANPOWER:
+            return cls(t['Issue'], kind, t['Summary'], sys.intern(str(t['Assignee'])), sys.intern(str(t['Parent'])),
+                       date_ord(t['Target Start']), date_ord(t['Target End']),
+                       parse_manhour_value(t['Man-hour']), t.get('resolutiondate'))
+        # Manpower 只需要名稱；其他類型不參與計算
+        return cls(t['Issue'], kind, t['Summary'] if kind == MANPOWER else None, None, None, 0, 0, None, None)
+
+
+def iter_records(tasks):
+    for t in tasks:
+        yield TaskRecord.from_task(t)
+
+
+# ---------- 串流讀取 ----------
+def iter_json_array(path, chunk_size=READ_CHUNK):
+    """逐筆讀取 JSON array 檔 (例如 Jira_Tasks.json)，記憶體只保留目前的 chunk 與單一元素"""
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buf, pos = '', 0
+        opened = eof = False
+        while True:
+            # 略過元素間的空白與逗號，以及開頭的 '['
+            pos = _SEPARATORS.match(buf, pos).end()
+            if not opened and pos < len(buf) and buf[pos] == '[':
+                opened = True
+                pos = _SEPARATORS.match(buf, pos + 1).end()
+            if pos < len(buf):
+                if buf[pos] == ']':
+                    return
+                try:
+                    obj, end = decoder.raw_decode(buf, pos)
+                except ValueError:
+                    # 元素被 chunk 切斷：讀入更多再試；檔案已結束則為格式錯誤
+                    if eof:
+                        raise
+                else:
+                    yield obj
+                    pos = end
+                    continue
+            elif eof:
+                return
+            more = f.read(chunk_size)
+            eof = not more
+            buf, pos = buf[pos:] + more, 0
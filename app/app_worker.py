@@ -0,0 +1,130 @@
+import sqlite3
+import threading
+import time
+
+from PyQt5.QtCore import QObject, QThread, pyqtSignal, pyqtSlot
+
+from app_jira_client import get_connection, load_config
+from app_snapshot import load_latest, SNAPSHOT_DIR
+
+# 執行中的 (thread, worker)；thread 結束前保留參照，避免被 Python 回收
+_running = set()
+
+
+# ---------- 背景更新 Worker ----------
+class RefreshWorker(QObject):
+    """在 QThread 中執行 app_init.main，以 signal 回報進度、階段、結果與錯誤"""
+    progress = pyqtSignal(int, int)     # 已下載筆數, 總筆數
+    stage = pyqtSignal(str)
+    finished = pyqtSignal(object, bool)     # workhour 結果 dict, 是否為本次更新的結果
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, engine=None):
+        super().__init__()
+        self.engine = engine
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        # 由 GUI thread 直接呼叫；worker thread 忙碌中無法處理排隊的 signal
+        self._cancel.set()
+
+    @pyqtSlot()
+    def run(self):
+        # 延後匯入，避免 jira/numpy 等模組拖慢視窗開啟
+        import app_init
+        from app_fetcher import RefreshCancelled
+        started = time.perf_counter()
+        try:
+            result = app_init.main(progress_callback=self.progress.emit, engine=self.engine,
+                                   stage_callback=self.stage.emit, cancel_event=self._cancel)
+        except RefreshCancelled:
+            self.cancelled.emit()
+            return
+        except Exception as e:
+            if self._cancel.is_set():
+                self.cancelled.emit()
+            else:
+                self.failed.emit(str(e))
+            return
+        if result is None:
+            # 未取得結果 (例如 JIRA 連線失敗)：在背景讀取最近一次的輸出，不阻塞 GUI
+            try:
+                self.finished.emit(app_init.load_workhour_result(), False)
+            except (OSError, ValueError, sqlite3.Error) as e:
+                self.failed.emit(f"未取得更新結果，且無法讀取上一次的輸出：{e}")
+            return
+        # 手動更新的結果也寫入快照，其他使用者開啟時可直接讀取
+        try:
+            app_init.save_snapshot(result, self.engine, round(time.perf_counter() - started, 2))
+        except OSError as e:
+            print(f"⚠️ 快照寫入失敗：{e}")
+        self.finished.emit(result, True)
+
+
+# ---------- 背景登入檢查 ----------
+class LoginWorker(QObject):
+    """建立共用 JIRA client 並呼叫 current_user()，不阻塞視窗開啟"""
+    finished = pyqtSignal(bool)
+
+    @pyqtSlot()
+    def run(self):
+        try:
+            ok = get_connection().check_login()
+        except Exception as e:
+            print(f"❌ JIRA 登入檢查失敗：{e}")
+            ok = False
+        self.finished.emit(ok)
+
+
+# ---------- 背景讀取最新快照 ----------
+class SnapshotWorker(QObject):
+    """讀取 snapshot_dir 的最新快照；finished(info, result)，尚無快照時皆為 None"""
+    finished = pyqtSignal(object, object)
+
+    @pyqtSlot()
+    def run(self):
+        try:
+            info, result = load_latest(load_config()['JIRA'].get('snapshot_dir', SNAPSHOT_DIR))
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️ 快照讀取失敗：{e}")
+            info, result = None, None
+        self.finished.emit(info, result)
+
+
+# ---------- 背景計算每日負載 ----------
+class DailyLoadWorker(QObject):
+    """由本地 tasks 計算規劃週內的每日負載；finished(result)，無 tasks 資料時為 None"""
+    finished = pyqtSignal(object)
+
+    def __init__(self, department=None):
+        super().__init__()
+        self.department = department
+
+    @pyqtSlot()
+    def run(self):
+        import app_init
+        try:
+            result = app_init.query_daily_load(department=self.department)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️ 每日負載計算失敗：{e}")
+            result = None
+        self.finished.emit(result)
+
+
+def start_worker(worker, *end_signals):
+    """建立 QThread 執行 worker.run；任一結束 signal 發出時自動收掉 thread"""
+    thread = QThread()
+    worker.moveToThread(thread)
+    thread.started.connect(worker.run)
+    for signal in end_signals or (worker.finished,):
+        signal.connect(thread.quit)
+    entry = (thread, worker)
+    _running.add(entry)
+    thread.finished.connect(lambda: _running.discard(entry))
+    thread.start()
+    return thread
+
+
+def start_refresh(worker):
+    return start_worker(worker, worker.finished, worker.failed, worker.cancelled)
@@ -0,0 +1,575 @@
+import heapq
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timedelta
+from collections import defaultdict
+from decimal import Decimal, ROUND_HALF_UP
+import dateutil.parser
+from app_calendar import as_calendar
+from app_tasks import TaskRecord, MANPOWER, SUB_MANPOWER, parse_manhour_value
+from app_store import issue_number
+
+DEFAULT_HORIZON = 3
+
+
+def round1(x):
+    return float(Decimal(str(x)).quantize(Decimal('0.1'), rounding=ROUND_HALF_UP))
+
+
+# ---------- 週次資訊 ----------
+def build_weeks(calendar, today=None, horizon=DEFAULT_HORIZON):
+    """從本週起依日曆順序取 horizon 週；超出已載入日曆的週不列入"""
+    today = today or datetime.now().strftime('%Y%m%d')
+    cur_week = calendar.week_of(today)
+    weeks = []
+    if cur_week:
+        for i, wid in enumerate(calendar.weeks_from(cur_week, horizon)):
+            start, end = calendar.week_range(wid)
+            workdays = calendar.week_workdays(wid)
+            weeks.append({
+                'wh_name': f"week_{i+1}",
+                'wh_week_id': wid,
+                'wh_week_start_date': start,
+                'wh_week_end_date': end,
+                'wh_week_workdates': workdays,
+                'wh_week_uplimit_hours': round(workdays * 8, 1),
+                'wh_week_downlimit_hours': round(workdays * 8 * 0.6, 1)
+            })
+    return weeks
+
+
+def is_resolved_before(resdate, now_date):
+    """resolutiondate + 14 天早於今天則視為已結案 (工時歸零)"""
+    cutoff = resolution_cutoff(resdate)
+    return cutoff is not None and cutoff < now_date.date()
+
+
+def resolution_cutoff(resdate):
+    """resolutiondate + 14 天的日期；未結案或無法解析時為 None"""
+    if resdate and resdate != 'NA':
+        try:
+            return (dateutil.parser.parse(resdate) + timedelta(days=14)).date()
+        except Exception as ex:
+            print(f"解析 resolutiondate 錯誤: {resdate}, {ex}")
+    return None
+
+
+def parse_manhour(task):
+    """Man-hour 轉 float；0 與 0.1 視為未填，回傳 None"""
+    return parse_manhour_value(task['Man-hour'])
+
+
+# ---------- 單一 Sub-Manpower 工時 ----------
+def compute_sub_issue(si, calendar, weeks, now_date, week_bounds=None, resolved=None):
+    """回傳 sub_issue 結果 dict；工時為 0 或 0.1 的項目回傳 None。
+    只計算與 [Target Start, Target End] 重疊的週，其餘週直接填 0。resolved 可由呼叫端預先判斷。"""
+    mh = parse_manhour(si)
+    if mh is None:
+        return None
+    bounds = week_bounds or ([wk['wh_week_start_date'] for wk in weeks], [wk['wh_week_end_date'] for wk in weeks])
+    resdate = si.get('resolutiondate', None)
+    if resolved is None:
+        resolved = is_resolved_before(resdate, now_date)
+    return sub_issue_record(si['Issue'], si['Summary'], mh, si['Target Start'], si['Target End'], resdate, resolved,
+                            calendar.workdays_between, bounds)
+
+
+def sub_issue_record(issue, name, mh, sd, ed, resdate, resolved, workdays_between, week_bounds):
+    """sd/ed 與 week_bounds 可為 'YYYYMMDD' 字串或整數日期 (比較語意相同)，workdays_between 需為對應型別的查詢"""
+    wd = workdays_between(sd, ed)
+    pd = round(mh / wd, 1) if wd else 0.0
+
+    # 各週交集天數與工時
+    starts, ends = week_bounds
+    n = len(starts)
+    week_inter = [0] * n
+    if wd:
+        zero = round1(mh / wd * 0)
+        week_hours = [zero] * n
+        for k in range(bisect_left(ends, sd), bisect_right(starts, ed)):
+            week_inter[k] = workdays_between(max(sd, starts[k]), min(ed, ends[k]))
+            week_hours[k] = round1(mh / wd * week_inter[k])
+    else:
+        week_hours = [0] * n
+
+    if resolved:
+        week_hours = [0] * n
+
+    rec = {
+        'sub_issue_id': issue,
+        'sub_issue_name': name,
+        'sub_issue_manpower': mh,
+        'sub_issue_work_day': wd,
+        'sub_issue_preday_hours': pd,
+    }
+    for k in range(n):
+        rec[f'sub_issue_work_day_week{k+1}'] = week_inter[k]
+    for k in range(n):
+        rec[f'week_{k+1}_hours'] = week_hours[k]
+    rec['resolutiondate'] = resdate if resdate else None
+    return rec
+
+
+# ---------- 逐筆累加 (批次與串流共用) ----------
+class WorkhourAccumulator:
+    """逐筆加入 task，Sub-Manpower 到達時即計算；result() 依批次版相同順序組出 workhour 資料"""
+
+    def __init__(self, annual_data, now=None, horizon=DEFAULT_HORIZON):
+        # 可直接傳入已建立的 WorkdayCalendar，避免重複建索引
+        self.calendar = as_calendar(annual_data)
+        self.now = now or datetime.now()
+        self.weeks = build_weeks(self.calendar, self.now.strftime('%Y%m%d'), horizon)
+        self.week_bounds = ([wk['wh_week_start_date'] for wk in self.weeks], [wk['wh_week_end_date'] for wk in self.weeks])
+        self.w1s, self.wne = self.week_bounds[0][0], self.week_bounds[1][-1]
+        # TaskRecord 使用的整數日期版本
+        self.int_bounds = tuple([int(d) for d in bounds] for bounds in self.week_bounds)
+        self.mains = {}
+        self.by_person = defaultdict(lambda: defaultdict(list))
+        self.added = 0
+
+    def add(self, t):
+        self.added += 1
+        if isinstance(t, TaskRecord):
+            self.add_record(t)
+        elif t['IssueType'] == 'Manpower':
+            self.mains[t['Issue']] = t['Summary']
+        elif t['IssueType'] == 'Sub-Manpower' and not (t['Target Start'] > self.wne or t['Target End'] < self.w1s):
+            # 即使工時為 0 也要保留人員/主項目分組
+            lst = self.by_person[t['Assignee']][t['Parent']]
+            rec = compute_sub_issue(t, self.calendar, self.weeks, self.now, self.week_bounds)
+            if rec is not None:
+                lst.append(rec)
+
+    def add_record(self, r):
+        """同 add，輸入為 app_tasks.TaskRecord (整數日期、已解析的工時)"""
+        if r.kind == MANPOWER:
+            self.mains[r.issue] = r.summary
+        elif r.kind == SUB_MANPOWER and not (r.start > self.int_bounds[1][-1] or r.end < self.int_bounds[0][0]):
+            lst = self.by_person[r.assignee][r.parent]
+            if r.manhour is not None:
+                lst.append(sub_issue_record(r.issue, r.summary, r.manhour, r.start, r.end, r.resolutiondate,
+                                            is_resolved_before(r.resolutiondate, self.now),
+                                            self.calendar.workdays_between_ord, self.int_bounds))
+
+    def extend(self, tasks):
+        for t in tasks:
+            self.add(t)
+
+    def result(self):
+        keys = [f'week_{k+1}_hours' for k in range(len(self.weeks))]
+        members = []
+        for name, issues in self.by_person.items():
+            member = {'name': name, 'issue': [
+                {'main_issue': mid, 'main_issue_name': self.mains.get(mid, ''), 'sub_issue': lst}
+                for mid, lst in issues.items()]}
+            member.update(member_totals(member['issue'], keys))
+            members.append(member)
+        return {'week': self.weeks, 'members': members}
+
+
+def member_totals(blocks, keys):
+    totals = dict.fromkeys(keys, 0)
+    for block in blocks:
+        for rec in block['sub_issue']:
+            # 只有有週工時才加總
+            if any(rec[key] for key in keys):
+                for key in keys:
+                    totals[key] += rec[key]
+    return {key: round(totals[key], 1) for key in keys}
+
+
+# ---------- 增量重算 (子項目結果快取 + 週總計差量) ----------
+class _Block:
+    """人員底下的一個主項目：子項目依 task 順序排列，週總計以 0.1 小時為單位的整數累計 (無浮點誤差)"""
+    __slots__ = ('orders', 'recs', 'tenths', 'count', 'out')
+
+    def __init__(self, nweeks):
+        self.orders = []                # [(order, sub_issue_id)] 已排序
+        self.recs = {}                  # sub_issue_id -> rec (工時未填為 None)
+        self.tenths = [0] * nweeks
+        self.count = 0                  # 有週工時的子項目數
+        self.out = None                 # 輸出用的 sub_issue list；None 表示需重建
+
+
+class _Member:
+    __slots__ = ('blocks', 'tenths', 'count', 'out', 'first')
+
+    def __init__(self, nweeks):
+        self.blocks = {}                # main_issue -> _Block
+        self.tenths = [0] * nweeks
+        self.count = 0
+        self.out = None                 # 輸出用的 member dict；None 表示需重建
+        self.first = None               # 第一個子項目的順序 (人員排列依據)；None 表示需重算
+
+    def first_order(self):
+        if self.first is None:
+            self.first = min(block.orders[0][0] for block in self.blocks.values())
+        return self.first
+
+
+class IncrementalWorkhour:
+    """跨多次更新保留每個 Sub-Manpower 的計算結果與人員/主項目的週總計。
+    以 issue 的 updated 判斷是否變更 (舊資料沒有 updated 時改用欄位內容)，只對新增、變更、刪除
+    與結案狀態改變的子項目重算並加減週總計；沒有變動的人員沿用上次的輸出。
+    compute(tasks) 接受完整 task 清單；apply(changed, deleted) 只接受增量同步的變更，不需讀取全部 tasks。
+    快取以 (日曆 signature, 週區間) 為世代，週區間滾動或假日資料變更時整批重建。
+    結果與 WorkhourAccumulator 完全相同 (順序、數值、型別)。"""
+
+    def __init__(self, horizon=DEFAULT_HORIZON):
+        self.horizon = horizon
+        self.epoch = None
+        self.last_stats = {}
+        self._reset(None)
+
+    def _reset(self, epoch, calendar=None, weeks=(), now=None):
+        self.epoch = epoch
+        self.calendar = calendar
+        self.weeks = list(weeks)
+        self.now = now
+        self.keys = [f'week_{k+1}_hours' for k in range(len(self.weeks))]
+        self.bounds = ([wk['wh_week_start_date'] for wk in self.weeks], [wk['wh_week_end_date'] for wk in self.weeks])
+        # sub_issue_id -> [變更判斷 key, 順序, 人員 (區間外為 None), 主項目, rec, 結案日 cutoff]
+        self.subs = {}
+        self.mains = {}             # Manpower id -> Summary
+        self.members = {}           # 人員 -> _Member
+        self.parents = defaultdict(set)     # 主項目 -> 有該主項目區塊的人員
+        self.pending = []           # 尚未結案的 (cutoff, sub_issue_id)，日期超過 cutoff 時重算
+        self.keyed = True           # 順序以 issue 編號表示 (task 清單依編號排序)；否則只能整批重建
+        self.order_dirty = True
+        self.member_list = []
+        self.in_window = 0
+
+    def _prepare(self, annual_data, now):
+        """建立本次的世代；世代改變時清除快取並回傳 True"""
+        calendar = as_calendar(annual_data)
+        now = now or datetime.now()
+        weeks = build_weeks(calendar, now.strftime('%Y%m%d'), self.horizon)
+        epoch = (calendar.signature, tuple((wk['wh_week_id'], wk['wh_week_start_date'], wk['wh_week_end_date'])
+                                           for wk in weeks))
+        changed = epoch != self.epoch
+        if changed:
+            self._reset(epoch, calendar, weeks, now)
+        self.now = now
+        return changed
+
+    @staticmethod
+    def _key(t):
+        updated = t.get('updated')
+        if updated and updated != 'NA':
+            return updated
+        return (t['Target Start'], t['Target End'], t['Man-hour'], t['Summary'], t.get('resolutiondate'),
+                t['Assignee'], t['Parent'])
+
+    # 差量維護
+    def _remove(self, sid):
+        entry = self.subs.pop(sid, None)
+        if entry is None or entry[2] is None:
+            return
+        _, order, name, parent, rec, _ = entry
+        member = self.members[name]
+        block = member.blocks[parent]
+        index = bisect_left(block.orders, (order, sid))
+        del block.orders[index]
+        del block.recs[sid]
+        self._add_hours(member, block, rec, -1)
+        block.out = member.out = None
+        self.in_window -= 1
+        if index == 0:
+            # 主項目/人員的排列位置以第一個子項目為準
+            member.first = None
+            self.order_dirty = True
+        if not block.orders:
+            del member.blocks[parent]
+            self.parents[parent].discard(name)
+        if not member.blocks:
+            del self.members[name]
+
+    def _insert(self, t, order):
+        sid = t['Issue']
+        key = self._key(t)
+        w1s, wne = self.bounds[0][0], self.bounds[1][-1]
+        if t['Target Start'] > wne or t['Target End'] < w1s:
+            self.subs[sid] = [key, order, None, None, None, None]
+            return False
+        cutoff = resolution_cutoff(t.get('resolutiondate'))
+        resolved = cutoff is not None and cutoff < self.now.date()
+        rec = compute_sub_issue(t, self.calendar, self.weeks, self.now, self.bounds, resolved)
+        name, parent = t['Assignee'], t['Parent']
+        self.subs[sid] = [key, order, name, parent, rec, cutoff]
+        if cutoff is not None and not resolved:
+            heapq.heappush(self.pending, (cutoff, sid))
+        member = self.members.get(name)
+        if member is None:
+            member = self.members[name] = _Member(len(self.weeks))
+        block = member.blocks.get(parent)
+        if block is None:
+            block = member.blocks[parent] = _Block(len(self.weeks))
+            self.parents[parent].add(name)
+        insort(block.orders, (order, sid))
+        self.in_window += 1
+        if block.orders[0][1] == sid:
+            member.first = None
+            self.order_dirty = True
+        block.recs[sid] = rec
+        self._add_hours(member, block, rec, 1)
+        block.out = member.out = None
+        return True
+
+    def _add_hours(self, member, block, rec, sign):
+        # 與 member_totals 相同：只有有週工時的子項目才加總
+        if rec is None or not any(rec[key] for key in self.keys):
+            return
+        for k, key in enumerate(self.keys):
+            tenths = sign * round(rec[key] * 10)
+            block.tenths[k] += tenths
+            member.tenths[k] += tenths
+        block.count += sign
+        member.count += sign
+
+    def _set_main(self, mid, summary):
+        if self.mains.get(mid) != summary:
+            if summary is None:
+                self.mains.pop(mid, None)
+            else:
+                self.mains[mid] = summary
+            for name in self.parents.get(mid, ()):
+                self.members[name].out = None
+
+    def _update(self, t, order):
+        """變更的子項目：先扣除舊結果再加入新結果"""
+        self._remove(t['Issue'])
+        return self._insert(t, order)
+
+    def _expire_resolved(self):
+        """日期超過結案日 + 14 天的子項目改為已結案，重算其週工時"""
+        today = self.now.date()
+        expired = 0
+        while self.pending and self.pending[0][0] < today:
+            cutoff, sid = heapq.heappop(self.pending)
+            entry = self.subs.get(sid)
+            if entry is None or entry[5] != cutoff or entry[2] is None:
+                continue
+            _, order, name, parent, rec, _ = entry
+            member = self.members[name]
+            block = member.blocks[parent]
+            self._add_hours(member, block, rec, -1)
+            if rec is not None:
+                rec = dict(rec)
+                for key in self.keys:
+                    rec[key] = 0
+            entry[4] = block.recs[sid] = rec
+            self._add_hours(member, block, rec, 1)
+            block.out = member.out = None
+            expired += 1
+        return expired
+
+    # 對外介面
+    def compute(self, tasks, annual_data, now=None):
+        rebuilt = self._prepare(annual_data, now)
+        if not self.weeks:
+            return {'week': self.weeks, 'members': []}
+
+        changed, mains, present = [], {}, set()
+        last, keyed = 0, True
+        for t in tasks:
+            kind = t['IssueType']
+            if kind == 'Manpower':
+                mains[t['Issue']] = t['Summary']
+            elif kind == 'Sub-Manpower':
+                sid = t['Issue']
+                present.add(sid)
+                entry = self.subs.get(sid)
+                order = issue_number(sid)
+                if order <= last:
+                    keyed = False
+                last = order
+                if entry is None or entry[0] != self._key(t):
+                    changed.append((t, order))
+        if not keyed or not self.keyed:
+            # 清單未依 issue 編號排序 (例如合併多個專案)：順序以清單位置表示，每次整批重建
+            self._reset(self.epoch, self.calendar, self.weeks, self.now)
+            self.keyed = keyed
+            rebuilt = True
+            changed = [(t, issue_number(t['Issue']) if keyed else i) for i, t in enumerate(tasks)
+                       if t['IssueType'] == 'Sub-Manpower']
+
+        removed = [sid for sid in self.subs if sid not in present]
+        for sid in removed:
+            self._remove(sid)
+        for mid in [mid for mid in self.mains if mid not in mains]:
+            self._set_main(mid, None)
+        for mid, summary in mains.items():
+            self._set_main(mid, summary)
+        recomputed = sum(self._update(t, order) for t, order in changed)
+        recomputed += self._expire_resolved()
+        self.last_stats = {'recomputed': recomputed, 'reused': self.in_window - recomputed,
+                           'removed': 0 if rebuilt else len(removed)}
+        return self.result()
+
+    def apply(self, changed, deleted, annual_data, now=None):
+        """增量同步的變更 (changed: 新增/更新的 tasks，deleted: 已刪除的 issue key)；
+        尚未以完整清單計算過、清單非依編號排序或世代改變時回傳 None，需改呼叫 compute"""
+        if self.epoch is None or not self.keyed or self._prepare(annual_data, now):
+            return None
+        if not self.weeks:
+            return {'week': self.weeks, 'members': []}
+        recomputed, removed = 0, 0
+        for sid in deleted:
+            removed += sid in self.subs
+            self._remove(sid)
+            if sid in self.mains:
+                self._set_main(sid, None)
+        for t in changed:
+            sid = t['Issue']
+            if t['IssueType'] == 'Manpower':
+                self._remove(sid)
+                self._set_main(sid, t['Summary'])
+            elif t['IssueType'] == 'Sub-Manpower':
+                entry = self.subs.get(sid)
+                # 同步的重疊區間會重複取得未變更的 issue
+                if entry is None or entry[0] != self._key(t):
+                    recomputed += self._update(t, issue_number(sid))
+            else:
+                self._remove(sid)
+        recomputed += self._expire_resolved()
+        self.last_stats = {'recomputed': recomputed, 'reused': self.in_window - recomputed, 'removed': removed}
+        return self.result()
+
+    def main_issue_totals(self, name):
+        """人員各主項目的週工時 {main_issue: {week_k_hours: 工時}} (由累計值直接取得，不重新加總)"""
+        member = self.members.get(name)
+        if member is None:
+            return {}
+        return {mid: self._hours(block.tenths, block.count) for mid, block in member.blocks.items()}
+
+    def _hours(self, tenths, count):
+        if not count:
+            return dict.fromkeys(self.keys, 0)
+        return {key: tenths[k] / 10 for k, key in enumerate(self.keys)}
+
+    def result(self):
+        if self.order_dirty:
+            self.member_list = sorted(self.members, key=lambda name: self.members[name].first_order())
+            self.order_dirty = False
+        members = []
+        for name in self.member_list:
+            member = self.members[name]
+            if member.out is None:
+                blocks = sorted(member.blocks.items(), key=lambda item: item[1].orders[0][0])
+                issue = []
+                for mid, block in blocks:
+                    if block.out is None:
+                        block.out = [block.recs[sid] for _, sid in block.orders if block.recs[sid] is not None]
+                    issue.append({'main_issue': mid, 'main_issue_name': self.mains.get(mid, ''),
+                                  'sub_issue': block.out})
+                member.out = {'name': name, 'issue': issue}
+                member.out.update(self._hours(member.tenths, member.count))
+            members.append(member.out)
+        return {'week': self.weeks, 'members': members}
+
+
+# ---------- 跨部門合併 ----------
+def merge_results(results):
+    """多個部門的結果合併為跨部門人員檢視：同名人員的主項目依部門順序串接，週工時由子項目重新加總"""
+    results = [r for r in results if r]
+    if not results:
+        return {'week': [], 'members': []}
+    weeks = results[0]['week']
+    keys = [f'week_{k+1}_hours' for k in range(len(weeks))]
+    blocks_by_name = {}
+    for result in results:
+        for member in result['members']:
+            blocks_by_name.setdefault(member['name'], []).extend(member['issue'])
+    members = []
+    for name, blocks in blocks_by_name.items():
+        member = {'name': name, 'issue': blocks}
+        member.update(member_totals(blocks, keys))
+        members.append(member)
+    return {'week': weeks, 'members': members}
+
+
+# ---------- 任意日期區間負載 ----------
+def compute_range_load(tasks, annual_data, start, end, now=None):
+    """[start, end] ('YYYYMMDD') 區間內每位人員的規劃工時，分攤與結案規則與週工時相同；
+    每筆 Sub-Manpower 只做常數次日曆查詢"""
+    calendar = as_calendar(annual_data)
+    now = now or datetime.now()
+    workdates = calendar.workdays_between(start, end)
+    totals = {}
+    for t in tasks:
+        if t['IssueType'] != 'Sub-Manpower' or t['Target Start'] > end or t['Target End'] < start:
+            continue
+        totals.setdefault(t['Assignee'], 0)
+        mh = parse_manhour(t)
+        if mh is None:
+            continue
+        sd, ed = t['Target Start'], t['Target End']
+        wd = calendar.workdays_between(sd, ed)
+        if not wd or is_resolved_before(t.get('resolutiondate'), now):
+            continue
+        totals[t['Assignee']] += round1(mh / wd * calendar.workdays_between(max(sd, start), min(ed, end)))
+    return {
+        'start_date': start,
+        'end_date': end,
+        'workdates': workdates,
+        'uplimit_hours': round(workdates * 8, 1),
+        'downlimit_hours': round(workdates * 8 * 0.6, 1),
+        'members': [{'name': name, 'hours': round(hours, 1)} for name, hours in totals.items()]
+    }
+
+
+# ---------- 每日負載曲線 ----------
+DAILY_LIMIT_HOURS = 8.0
+
+
+def compute_daily_load(tasks, annual_data, start, end, now=None, limit=DAILY_LIMIT_HOURS):
+    """[start, end] 區間內每位人員每個工作日的規劃工時 (子項目工時平均分攤到其工作日，結案規則與週工時相同)。
+    每筆 Sub-Manpower 只在差分陣列的起訖加減每日工時，最後對每位人員掃描一次日曆：O(子項目數 + 天數)"""
+    calendar = as_calendar(annual_data)
+    now = now or datetime.now()
+    lo, hi = calendar.index_range(start, end)
+    diffs = {}
+    for t in tasks:
+        if t['IssueType'] != 'Sub-Manpower' or t['Target Start'] > end or t['Target End'] < start:
+            continue
+        diff = diffs.get(t['Assignee'])
+        if diff is None:
+            diff = diffs[t['Assignee']] = [0.0] * (hi - lo + 1)
+        mh = parse_manhour(t)
+        if mh is None:
+            continue
+        sd, ed = t['Target Start'], t['Target End']
+        wd = calendar.workdays_between(sd, ed)
+        if not wd or is_resolved_before(t.get('resolutiondate'), now):
+            continue
+        a, b = calendar.index_range(max(sd, start), min(ed, end))
+        if b > a:
+            diff[a - lo] += mh / wd
+            diff[b - lo] -= mh / wd
+
+    workdays = [i for i in range(lo, hi) if not calendar.holiday[i]]
+    members = []
+    for name, diff in diffs.items():
+        level = 0.0
+        levels = []
+        for d in diff[:-1]:
+            level += d
+            levels.append(level)
+        # 四捨五入到 0.1 再比較，避免浮點累加誤差造成誤判超載
+        daily = [round(levels[i - lo], 1) + 0.0 for i in workdays]
+        over = [k for k, h in enumerate(daily) if h > limit]
+        peak = max(range(len(daily)), key=daily.__getitem__) if daily else None
+        members.append({
+            'name': name,
+            'daily': daily,
+            'peak_hours': daily[peak] if daily else 0.0,
+            'peak_date': calendar.dates[workdays[peak]] if daily else None,
+            'overload_days': len(over),
+            'first_overload': calendar.dates[workdays[over[0]]] if over else None,
+        })
+    return {
+        'start_date': start,
+        'end_date': end,
+        'dates': [calendar.dates[i] for i in workdays],
+        'limit_hours': limit,
+        'members': members
+    }
@@ -0,0 +1,139 @@
+import re
+from datetime import datetime, date
+from collections import defaultdict
+
+import numpy as np
+import dateutil.parser
+
+from app_calendar import as_calendar
+from app_tasks import parse_manhour_value
+from app_workhour import build_weeks, round1, DEFAULT_HORIZON
+
+ISO_DATE = re.compile(r'^\d{4}-\d{2}-\d{2}T')
+NO_RESOLUTION = np.iinfo(np.int64).max
+
+
+# ---------- ROUND_HALF_UP 一位小數 (向量化) ----------
+def round1_array(values):
+    """與 round1 (Decimal(str(x)) + ROUND_HALF_UP) 逐元素相同；接近 .x5 的值改用 round1 精確處理"""
+    scaled = values * 10
+    out = np.floor(scaled + 0.5) / 10
+    frac = scaled - np.floor(scaled)
+    ambiguous = np.nonzero(np.abs(frac - 0.5) < 1e-6)[0]
+    for i in ambiguous:
+        out[i] = round1(float(values[i]))
+    return out
+
+
+def resolution_ordinal(resdate):
+    """resolutiondate 的日期序號；無值回傳 NO_RESOLUTION，解析失敗回傳 None"""
+    if not resdate or resdate == 'NA':
+        return NO_RESOLUTION
+    try:
+        if isinstance(resdate, str) and ISO_DATE.match(resdate):
+            return date.fromisoformat(resdate[:10]).toordinal()
+        return dateutil.parser.parse(resdate).date().toordinal()
+    except Exception as ex:
+        print(f"解析 resolutiondate 錯誤: {resdate}, {ex}")
+        return None
+
+
+# ---------- 向量化工時計算 ----------
+def compute_workhour_numpy(tasks, annual_data, now=None, horizon=DEFAULT_HORIZON):
+    """以欄位陣列一次計算所有 Sub-Manpower 的 issue × week 工時矩陣，再依人員 group-by 加總；
+    輸出與 WorkhourAccumulator.result() 相同"""
+    calendar = as_calendar(annual_data)
+    now = now or datetime.now()
+    weeks = build_weeks(calendar, now.strftime('%Y%m%d'), horizon)
+    w1s, wne = weeks[0]['wh_week_start_date'], weeks[-1]['wh_week_end_date']
+
+    # 1. 篩選並分組 (保留原本人員/主項目的出現順序)
+    mains = {}
+    by_person = defaultdict(lambda: defaultdict(list))
+    subs = []
+    for t in tasks:
+        if t['IssueType'] == 'Manpower':
+            mains[t['Issue']] = t['Summary']
+        elif t['IssueType'] == 'Sub-Manpower' and not (t['Target Start'] > wne or t['Target End'] < w1s):
+            lst = by_person[t['Assignee']][t['Parent']]
+            mh = parse_manhour_value(t['Man-hour'])
+            if mh is None:
+                continue
+            lst.append(len(subs))
+            subs.append((t, mh))
+
+    # 2. 欄位陣列
+    n = len(subs)
+    dates = np.array(calendar.dates)
+    prefix = np.array(calendar.prefix, dtype=np.int64)
+    starts = np.array([str(t['Target Start']) for t, _ in subs], dtype=str)
+    ends = np.array([str(t['Target End']) for t, _ in subs], dtype=str)
+    manhours = np.array([mh for _, mh in subs], dtype=np.float64)
+    res_ords = [resolution_ordinal(t.get('resolutiondate')) for t, _ in subs]
+    resolved = np.array([r is not None and r != NO_RESOLUTION and r + 14 < now.date().toordinal() for r in res_ords],
+                        dtype=bool)
+
+    lo = np.searchsorted(dates, starts, side='left')
+    hi = np.searchsorted(dates, ends, side='right')
+    workdays = np.where(hi > lo, prefix[hi] - prefix[lo], 0)
+
+    # 3. issue × week 交集天數與工時
+    week_lo = np.array([calendar.ordinal[wk['wh_week_start_date']] for wk in weeks])
+    week_hi = np.array([calendar.ordinal[wk['wh_week_end_date']] + 1 for wk in weeks])
+    a = np.maximum(lo[:, None], week_lo[None, :])
+    b = np.minimum(hi[:, None], week_hi[None, :])
+    inter = np.where(b > a, prefix[b] - prefix[a], 0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        raw = manhours[:, None] / workdays[:, None] * inter
+    hours = round1_array(raw.ravel()).reshape(raw.shape)
+    zeroed = (workdays == 0) | resolved
+    hours[zeroed, :] = 0.0
+
+    # 4. 依輸出順序的 group-by 加總 (順序與逐筆累加相同，浮點結果一致)
+    member_names = list(by_person)
+    order = np.array([i for name in member_names for lst in by_person[name].values() for i in lst], dtype=np.int64)
+    member_code = np.empty(n, dtype=np.int64)
+    for code, name in enumerate(member_names):
+        for lst in by_person[name].values():
+            member_code[lst] = code
+    counted = np.any(hours != 0, axis=1)
+    m = len(member_names)
+    totals = np.column_stack([
+        np.bincount(member_code[order], weights=hours[order, k], minlength=m) for k in range(len(weeks))
+    ])
+    contributed = np.bincount(member_code[counted], minlength=m)
+
+    # 5. 組出輸出結構 (先轉成 list，避免逐元素存取 numpy scalar)
+    nw = len(weeks)
+    day_keys = [f'sub_issue_work_day_week{k+1}' for k in range(nw)]
+    hour_keys = [f'week_{k+1}_hours' for k in range(nw)]
+    workdays_l, inter_l, hours_l, zeroed_l = workdays.tolist(), inter.tolist(), hours.tolist(), zeroed.tolist()
+    totals_l, contributed_l = totals.tolist(), contributed.tolist()
+    members = []
+    for code, name in enumerate(member_names):
+        member = {'name': name, 'issue': []}
+        for mid, lst in by_person[name].items():
+            block = {'main_issue': mid, 'main_issue_name': mains.get(mid, ''), 'sub_issue': []}
+            for i in lst:
+                t, mh = subs[i]
+                wd = workdays_l[i]
+                wi = inter_l[i]
+                wh = [0] * nw if zeroed_l[i] else hours_l[i]
+                resdate = t.get('resolutiondate', None)
+                rec = {
+                    'sub_issue_id': t['Issue'],
+                    'sub_issue_name': t['Summary'],
+                    'sub_issue_manpower': mh,
+                    'sub_issue_work_day': wd,
+                    'sub_issue_preday_hours': round(mh / wd, 1) if wd else 0.0,
+                }
+                rec.update(zip(day_keys, wi))
+                rec.update(zip(hour_keys, wh))
+                rec['resolutiondate'] = resdate if resdate else None
+                block['sub_issue'].append(rec)
+            member['issue'].append(block)
+        for k, key in enumerate(hour_keys):
+            member[key] = round(totals_l[code][k], 1) if contributed_l[code] else 0
+        members.append(member)
+    return {'week': weeks, 'members': members}
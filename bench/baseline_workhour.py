@@ -0,0 +1,129 @@
+"""改版前 (baseline) app_init.calculate_workhour 的原始實作，供 check_baseline.py 比對輸出。
+只把檔案讀寫改為參數與回傳值，計算邏輯保持原樣，請勿修改"""
+from datetime import datetime, timedelta
+from collections import defaultdict
+from decimal import Decimal, ROUND_HALF_UP
+import dateutil.parser
+
+
+def round1(x):
+    return float(Decimal(str(x)).quantize(Decimal('0.1'), rounding=ROUND_HALF_UP))
+
+
+def modify_annual_data(data):
+    # 勞動節 (5/1) 強制為假日
+    for entry in data:
+        if entry['date'][4:] == '0501':
+            entry['isHoliday'] = True
+    # 六、日為假日
+    for entry in data:
+        if entry['week'] in ['六', '日']:
+            entry['isHoliday'] = True
+    return data
+
+
+def calculate_workhour(tasks, annual_data):
+    # 產生週次資訊
+    week_map = {'日': 0, '一': 1, '二': 2, '三': 3, '四': 4, '五': 5, '六': 6}
+    date_to_week = {}
+    for entry in annual_data:
+        d = entry['date']; y, m, day = int(d[:4]), int(d[4:6]), int(d[6:])
+        code = y % 10
+        wd = week_map[entry['week']]
+        wn = 1 if (m == 1 and day <= 6) else ((m - 1) * 31 + day - 1) // 7 + 1
+        if m == 12 and day == 31 and wd != 5:
+            code = (y + 1) % 10; wn = 1
+        date_to_week[d] = f"{code}{wn:02d}"
+
+    today = datetime.now().strftime('%Y%m%d')
+    cur_week = date_to_week.get(today)
+    weeks = []
+    if cur_week:
+        num = int(cur_week[1:]); yc = cur_week[0]
+        for i in range(3):
+            wid = f"{yc}{num+i:02d}"
+            dates = sorted([d for d, w in date_to_week.items() if w == wid])
+            workdays = [d for d in dates if not next(x for x in annual_data if x['date'] == d)['isHoliday']]
+            weeks.append({
+                'wh_name': f"week_{i+1}",
+                'wh_week_id': wid,
+                'wh_week_start_date': dates[0],
+                'wh_week_end_date': dates[-1],
+                'wh_week_workdates': len(workdays),
+                'wh_week_uplimit_hours': round(len(workdays) * 8, 1),
+                'wh_week_downlimit_hours': round(len(workdays) * 8 * 0.6, 1)
+            })
+
+    w1s, w3e = weeks[0]['wh_week_start_date'], weeks[-1]['wh_week_end_date']
+    members = []
+    mains = {t['Issue']: t['Summary'] for t in tasks if t['IssueType'] == 'Manpower'}
+    subs = [t for t in tasks if t['IssueType'] == 'Sub-Manpower' and not (t['Target Start'] > w3e or t['Target End'] < w1s)]
+    by_person = defaultdict(lambda: defaultdict(list))
+    for t in subs:
+        by_person[t['Assignee']][t['Parent']].append(t)
+
+    for name, issues in by_person.items():
+        member = {'name': name, 'issue': []}
+        totals = {'week_1_hours': 0, 'week_2_hours': 0, 'week_3_hours': 0}
+        for mid, lst in issues.items():
+            block = {'main_issue': mid, 'main_issue_name': mains.get(mid, ''), 'sub_issue': []}
+            for si in lst:
+                mh = float(si['Man-hour']) if si['Man-hour'] != 'NA' else 0
+                if mh == 0.1 or mh == 0:
+                    continue
+
+                sd, ed = si['Target Start'], si['Target End']
+                valid = [e['date'] for e in annual_data if sd <= e['date'] <= ed and not e['isHoliday']]
+                wd = len(valid)
+                pd = round(mh / wd, 1) if wd else 0.0
+
+                # 三週交集天數
+                week_inter = []
+                for wk in weeks:
+                    week_dates = [d for d in valid if wk['wh_week_start_date'] <= d <= wk['wh_week_end_date']]
+                    week_inter.append(len(week_dates))
+
+                # 三週工時計算（預設值）
+                w1 = round1(mh / wd * week_inter[0]) if (wd and len(week_inter) > 0) else 0
+                w2 = round1(mh / wd * week_inter[1]) if (wd and len(week_inter) > 1) else 0
+                w3 = round1(mh / wd * week_inter[2]) if (wd and len(week_inter) > 2) else 0
+
+                # resolutiondate 判斷，若已結案+14天早於今天則三週工時歸零
+                resdate = si.get('resolutiondate', None)
+                if resdate and resdate != 'NA':
+                    try:
+                        resolved_date = dateutil.parser.parse(resdate) + timedelta(days=14)
+                        now_date = datetime.now()
+                        if resolved_date.date() < now_date.date():
+                            w1 = w2 = w3 = 0
+                    except Exception as ex:
+                        print(f"解析 resolutiondate 錯誤: {resdate}, {ex}")
+
+                block['sub_issue'].append({
+                    'sub_issue_id': si['Issue'],
+                    'sub_issue_name': si['Summary'],
+                    'sub_issue_manpower': mh,
+                    'sub_issue_work_day': wd,
+                    'sub_issue_preday_hours': pd,
+                    'sub_issue_work_day_week1': week_inter[0] if len(week_inter) > 0 else 0,
+                    'sub_issue_work_day_week2': week_inter[1] if len(week_inter) > 1 else 0,
+                    'sub_issue_work_day_week3': week_inter[2] if len(week_inter) > 2 else 0,
+                    'week_1_hours': w1,
+                    'week_2_hours': w2,
+                    'week_3_hours': w3,
+                    'resolutiondate': resdate if resdate else None
+                })
+
+                # 只有有週工時才加總
+                if w1 or w2 or w3:
+                    totals['week_1_hours'] += w1
+                    totals['week_2_hours'] += w2
+                    totals['week_3_hours'] += w3
+
+            member['issue'].append(block)
+        member['week_1_hours'] = round(totals['week_1_hours'], 1)
+        member['week_2_hours'] = round(totals['week_2_hours'], 1)
+        member['week_3_hours'] = round(totals['week_3_hours'], 1)
+        members.append(member)
+
+    return {'week': weeks, 'members': members}
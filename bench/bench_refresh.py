@@ -0,0 +1,193 @@
+"""完整更新流程 benchmark (本機 JIRA 替身 + 合成資料，不需連網)
+
+    python bench/bench_refresh.py --sizes 1000 10000 100000 --output bench_results.json
+
+實際的入口 app_init.fetch_jira_issues 與各引擎的 app_init.calculate_workhour 的秒數 (含 app_metrics 的
+內部階段：抓取、Issue 正規化、Jira_Tasks.json 寫/讀、工時計算、workhour.json 寫入)、workhour.json 讀取與 GUI model
+的秒數寫成 JSON，可跨版本比對。
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.join(BENCH_DIR, '..', 'app')
+sys.path.insert(0, APP_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+# numpy 引擎的 import 不計入計算時間
+try:
+    import numpy
+    import app_workhour_np  # noqa: F401
+except ImportError:
+    numpy = None
+
+from fake_jira import FakeJiraServer
+from synthetic import generate_raw_issues, write_calendar_files
+
+
+class Timer:
+    def __init__(self):
+        self.stages = {}
+
+    def run(self, name, fn, *args, **kwargs):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        self.stages[name] = round(time.perf_counter() - start, 6)
+        return result
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+
+def write_ini(path, server_url, args):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f"""[JIRA]
+server = {server_url}
+api_token = bench
+project_key = BENCH
+batch_size = {args.page_size}
+concurrency = {args.concurrency}
+max_retries = 5
+retry_backoff = 0.05
+""")
+
+
+def populate_models(result):
+    """GUI model 建立時間；PyQt5 不存在時略過"""
+    try:
+        os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+        from PyQt5.QtWidgets import QApplication
+        from PyQt5.QtGui import QStandardItemModel, QStandardItem
+        from app_table_model import MemberHoursModel
+    except ImportError:
+        return {}
+    app = QApplication.instance() or QApplication([])
+    timer = Timer()
+    model = MemberHoursModel()
+    timer.run('gui_table_model', model.set_workhour, result)
+
+    def legacy():
+        # 改版前的逐格 QStandardItem 作法，供比較
+        legacy_model = QStandardItemModel()
+        for row, m in enumerate(result['members']):
+            for col in range(len(result['week'])):
+                legacy_model.setItem(row, col, QStandardItem(str(m.get(f'week_{col+1}_hours', 0))))
+        return legacy_model
+    timer.run('gui_standard_item_model', legacy)
+    return timer.stages
+
+
+def run_entry(timer, name, fn, *args, **kwargs):
+    """以 app_metrics 量測 app 的入口函式：總秒數記為 name，內部階段記為 name.階段"""
+    import app_metrics
+    with app_metrics.refresh_run(f'bench_{name}', metrics_dir='metrics') as metrics:
+        result = timer.run(name, fn, *args, **kwargs)
+    for stage, seconds in metrics.stages.items():
+        timer.stages[f'{name}.{stage}'] = round(seconds, 6)
+    return result
+
+
+def bench_size(app_init, server, n, args):
+    project = f"B{n}"
+    server.add_project(project, generate_raw_issues(n, project=project, today=date.today()))
+    app_init.project_key = project
+    timer = Timer()
+
+    # GUI/CLI 實際呼叫的入口：抓取 + 正規化 + 寫入 Jira_Tasks.json
+    requests_before = server.requests
+    tasks = run_entry(timer, 'fetch_jira_issues', app_init.fetch_jira_issues, project=project)
+    fetch_requests = server.requests - requests_before
+    issues = len(tasks)
+    del tasks
+
+    # 假日資料先載入 (CalendarService 快取)，各引擎的 calculate_workhour 只含讀取 tasks、計算與寫入 workhour.json
+    timer.run('calendar', app_init.load_calendar)
+    engines = ['loop'] + (['numpy'] if numpy is not None else [])
+    for engine in engines:
+        run_entry(timer, f'calculate_workhour_{engine}', app_init.calculate_workhour, engine=engine)
+
+    def read_json(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    result = timer.run('workhour_json_read', read_json, 'workhour.json')
+    timer.stages.update(populate_models(result))
+
+    subs = sum(len(b['sub_issue']) for m in result['members'] for b in m['issue'])
+    return {
+        'size': n,
+        'stages': timer.stages,
+        'counts': {'issues': issues, 'requests': fetch_requests, 'members': len(result['members']),
+                   'sub_issues_in_window': subs},
+        'bytes': {'Jira_Tasks.json': os.path.getsize('Jira_Tasks.json'),
+                  'workhour.json': os.path.getsize('workhour.json')},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--latency', type=float, default=0.02, help='每個 search 請求的延遲秒數')
+    parser.add_argument('--jitter', type=float, default=0.01)
+    parser.add_argument('--error-rate', type=float, default=0.0, help='search 回傳 503 的比例')
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=5)
+    parser.add_argument('--output', default='bench_results.json')
+    args = parser.parse_args()
+    output = os.path.abspath(args.output)
+
+    server = FakeJiraServer(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate).start()
+    workdir = tempfile.mkdtemp(prefix='manpower-bench-')
+    cwd = os.getcwd()
+    try:
+        os.chdir(workdir)
+        year = datetime.now().year
+        write_calendar_files(workdir, [year - 1, year, year + 1])
+        write_ini(os.path.join(workdir, 'ManPowerTool.ini'), server.url, args)
+        import app_init
+        import app_calendar
+        from app_http import HttpClient
+        app_init.configure(os.path.join(workdir, 'ManPowerTool.ini'))
+        # 只使用合成的假日資料：日曆不連 CDN (JIRA 仍連本機替身)
+        app_calendar._service = app_calendar.CalendarService(workdir, http=HttpClient(offline=True))
+
+        results = []
+        for n in args.sizes:
+            entry = bench_size(app_init, server, n, args)
+            results.append(entry)
+            stages = '  '.join(f"{k}={v:.3f}s" for k, v in entry['stages'].items())
+            print(f"{n:>7}: {stages}")
+    finally:
+        os.chdir(cwd)
+        server.stop()
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'latency': args.latency, 'jitter': args.jitter, 'error_rate': args.error_rate,
+            'page_size': args.page_size, 'concurrency': args.concurrency,
+        },
+        'results': results,
+    }
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"結果已寫入 {output}")
+
+
+if __name__ == '__main__':
+    main()
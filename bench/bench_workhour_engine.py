@@ -0,0 +1,46 @@
+"""比較 loop 與 numpy 工時計算引擎：python bench/bench_workhour_engine.py [筆數 ...]"""
+import os
+import sys
+import time
+import json
+from datetime import date, datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+from app_calendar import WorkdayCalendar
+from app_workhour import WorkhourAccumulator
+from app_workhour_np import compute_workhour_numpy
+from synthetic import generate_calendar, generate_tasks
+
+
+def run_loop(tasks, calendar, now):
+    acc = WorkhourAccumulator(calendar, now)
+    acc.extend(tasks)
+    return acc.result()
+
+
+def best_of(fn, repeat):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main(sizes):
+    now = datetime.now()
+    calendar = WorkdayCalendar(generate_calendar(now.year))
+    for n in sizes:
+        tasks = generate_tasks(n, today=date.today())
+        repeat = 3 if n <= 10000 else 1
+        t_loop, r_loop = best_of(lambda: run_loop(tasks, calendar, now), repeat)
+        t_np, r_np = best_of(lambda: compute_workhour_numpy(tasks, calendar, now), repeat)
+        same = json.dumps(r_loop, ensure_ascii=False) == json.dumps(r_np, ensure_ascii=False)
+        print(f"{n:>7} issues  loop {t_loop * 1000:8.1f} ms  numpy {t_np * 1000:8.1f} ms  "
+              f"x{t_loop / t_np:4.1f}  identical={same}")
+
+
+if __name__ == '__main__':
+    main([int(x) for x in sys.argv[1:]] or [10000, 100000])
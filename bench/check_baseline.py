@@ -0,0 +1,71 @@
+"""各工時引擎的 workhour.json 需與改版前 (baseline) 的輸出逐 byte 相同：python bench/check_baseline.py"""
+import os
+import sys
+import json
+import shutil
+import tempfile
+from datetime import date
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'app'))
+sys.path.insert(0, BENCH_DIR)
+
+import baseline_workhour
+from synthetic import generate_tasks, write_calendar_files
+
+ENGINES = ['loop', 'numpy', 'incremental']
+CASES = [
+    # (task 數, 人員數, 亂數種子)
+    (2000, 50, 0),
+    (5000, 200, 1),
+    (300, 5, 2),
+]
+
+
+def baseline_bytes(tasks, year):
+    with open(f"{year}.json", 'r', encoding='utf-8') as f:
+        annual_data = baseline_workhour.modify_annual_data(json.load(f))
+    result = baseline_workhour.calculate_workhour(tasks, annual_data)
+    return json.dumps(result, ensure_ascii=False, indent=2).encode('utf-8')
+
+
+def check(app_init, n, members, seed, year):
+    tasks = generate_tasks(n, today=date.today(), members=members, seed=seed)
+    with open('Jira_Tasks.json', 'w', encoding='utf-8') as f:
+        json.dump(tasks, f, ensure_ascii=False)
+    expected = baseline_bytes(tasks, year)
+    ok = True
+    for engine in ENGINES:
+        app_init.calculate_workhour(engine=engine)
+        with open(app_init.WORKHOUR_JSON, 'rb') as f:
+            same = f.read() == expected
+        ok = ok and same
+        print(f"{'OK ' if same else 'NG '} tasks={n} members={members} seed={seed} engine={engine}")
+    return ok
+
+
+def main():
+    workdir = tempfile.mkdtemp(prefix='manpower-baseline-')
+    cwd = os.getcwd()
+    try:
+        os.chdir(workdir)
+        # baseline 只讀取當年度的假日資料；日曆不連網，兩邊使用同一份合成資料
+        year = date.today().year
+        write_calendar_files(workdir, [year])
+        with open('ManPowerTool.ini', 'w', encoding='utf-8') as f:
+            f.write("[JIRA]\nproject_key = BENCH\n")
+        import app_init
+        import app_calendar
+        from app_http import HttpClient
+        app_init.configure(os.path.join(workdir, 'ManPowerTool.ini'))
+        app_calendar._service = app_calendar.CalendarService(workdir, http=HttpClient(offline=True))
+        results = [check(app_init, *case, year) for case in CASES]
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+    if not all(results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""batch_size 超過伺服器單頁上限時分頁不可遺漏 issue：python bench/check_page_cap.py"""
+import os
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'app'))
+sys.path.insert(0, BENCH_DIR)
+
+from jira import JIRA
+
+from app_fetcher import PageFetcher
+from fake_jira import FakeJiraServer
+from synthetic import generate_raw_issues
+
+CASES = [
+    # (issue 數, 伺服器上限, batch_size, raw_json)
+    (2500, 1000, 2000, True),
+    (2500, 1000, 2000, False),
+    (2500, 1000, 1000, True),
+    (2345, 300, 500, True),
+    (50, 1000, 2000, True),
+    (0, 1000, 2000, True),
+]
+
+
+def check(n, max_page, batch_size, raw_json):
+    server = FakeJiraServer(latency=0, jitter=0, max_page=max_page).start()
+    try:
+        issues = generate_raw_issues(n, project='CAP') if n else []
+        server.add_project('CAP', issues)
+        jira = JIRA(server=server.url, token_auth='bench', get_server_info=False)
+        fetcher = PageFetcher(jira, page_size=batch_size, concurrency=4, raw_json=raw_json)
+        fetched = fetcher.fetch_all('project = CAP ORDER BY key ASC', ['summary'])
+        keys = [i['key'] if raw_json else i.key for i in fetched]
+        expected = [i['key'] for i in issues]
+        ok = keys == expected
+        print(f"{'OK ' if ok else 'NG '} issues={n} max_page={max_page} batch_size={batch_size} "
+              f"raw_json={raw_json}: {len(keys)}/{len(expected)} ({server.requests} requests)")
+        return ok
+    finally:
+        server.stop()
+
+
+def main():
+    results = [check(*case) for case in CASES]
+    if not all(results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""本機 JIRA REST 替身：提供 search / field / myself / serverInfo，可設定延遲與 503 比例"""
+import json
+import random
+import re
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+PROJECT_RE = re.compile(r'project\s*=\s*"?([A-Za-z0-9_]+)"?')
+FIELD_DEFS = [
+    {'id': fid, 'key': fid, 'name': name, 'custom': fid.startswith('customfield_'), 'navigable': True,
+     'searchable': True, 'clauseNames': [fid]}
+    for fid, name in [('summary', 'Summary'), ('issuetype', 'Issue Type'), ('status', 'Status'),
+                      ('assignee', 'Assignee'), ('parent', 'Parent'), ('resolutiondate', 'Resolved'),
+                      ('updated', 'Updated'), ('customfield_10109', 'Target start'),
+                      ('customfield_10110', 'Target end'), ('customfield_12046', 'Man-hour')]
+]
+UPDATED_RE = re.compile(r'updated\s*>=\s*"([^"]+)"')
+MAX_PAGE = 1000
+
+
+class FakeJiraServer:
+    def __init__(self, latency=0.02, jitter=0.01, error_rate=0.0, seed=0, max_page=MAX_PAGE):
+        self.latency = latency
+        self.max_page = max_page
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.projects = {}
+        self.requests = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = None
+
+    def add_project(self, key, issues):
+        self.projects[key] = issues
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                params = {k: v if k == 'fields' else v[0] for k, v in parse_qs(parsed.query).items()}
+                server.handle(self, parsed.path, params)
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                body = json.loads(self.rfile.read(length) or b'{}')
+                server.handle(self, urlparse(self.path).path, body)
+
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._httpd.daemon_threads = True
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+
+    def _send(self, handler, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        handler.send_response(status)
+        handler.send_header('Content-Type', 'application/json')
+        handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def handle(self, handler, path, params):
+        with self._lock:
+            self.requests += 1
+            delay = self.latency + self._rng.uniform(0, self.jitter)
+            fail = self._rng.random() < self.error_rate
+        time.sleep(delay)
+        if path.endswith('/serverInfo'):
+            return self._send(handler, 200, {'deploymentType': 'Server', 'version': '9.12.0',
+                                             'versionNumbers': [9, 12, 0]})
+        if path.endswith('/field'):
+            return self._send(handler, 200, FIELD_DEFS)
+        if path.endswith('/myself'):
+            return self._send(handler, 200, {'name': 'bench', 'key': 'bench', 'displayName': 'Bench'})
+        if path.endswith('/search'):
+            if fail:
+                return self._send(handler, 503, {'errorMessages': ['Service Unavailable']})
+            return self._send(handler, 200, self.search(params))
+        self._send(handler, 404, {'errorMessages': [f'not found: {path}']})
+
+    def search(self, params):
+        jql = params.get('jql', '')
+        match = PROJECT_RE.search(jql)
+        issues = self.projects.get(match.group(1), []) if match else []
+        updated = UPDATED_RE.search(jql)
+        if updated:
+            since = updated.group(1).replace('/', '-').replace(' ', 'T')
+            issues = [i for i in issues if i['fields'].get('updated', '') >= since]
+        start = int(params.get('startAt', 0) or 0)
+        size = min(int(params.get('maxResults', 50) or 50), self.max_page)
+        fields = params.get('fields') or []
+        if isinstance(fields, str):
+            fields = [fields]
+        wanted = {f for item in fields for f in item.split(',') if f}
+        page = issues[start:start + size]
+        if wanted and '*all' not in wanted:
+            page = [dict(i, fields={k: v for k, v in i['fields'].items() if k in wanted}) for i in page]
+        return {'startAt': start, 'maxResults': size, 'total': len(issues), 'issues': page}
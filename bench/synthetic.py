@@ -0,0 +1,98 @@
+import random
+from datetime import date, timedelta
+
+WEEK_NAMES = '一二三四五六日'
+
+
+# ---------- 合成資料 ----------
+def generate_calendar(year, holiday_ratio=0.03, seed=0):
+    """產生與 TaiwanCalendar 相同格式的年度資料 (固定亂數種子，可重現)"""
+    rng = random.Random(seed + year)
+    d = date(year, 1, 1)
+    data = []
+    while d.year == year:
+        week = WEEK_NAMES[d.weekday()]
+        data.append({
+            'date': d.strftime('%Y%m%d'),
+            'week': week,
+            'isHoliday': week in '六日' or rng.random() < holiday_ratio,
+            'description': ''
+        })
+        d += timedelta(days=1)
+    return data
+
+
+def generate_tasks(n, today=None, members=200, seed=0):
+    """產生 Jira_Tasks.json 格式的 task：約 1/10 為 Manpower，其餘為 Sub-Manpower"""
+    rng = random.Random(seed)
+    today = today or date.today()
+    people = [f"Member{i:03d}" for i in range(members)]
+    tasks, mains = [], []
+    for i in range(max(1, n // 10)):
+        key = f"MP-{len(tasks) + 1}"
+        mains.append(key)
+        tasks.append({
+            "Issue": key, "IssueType": "Manpower", "Summary": f"Main {i}", "Status": "Open",
+            "Assignee": rng.choice(people), "Target Start": "NA", "Target End": "NA",
+            "Man-hour": "NA", "Parent": "NA", "resolutiondate": None
+        })
+    while len(tasks) < n:
+        key = f"MP-{len(tasks) + 1}"
+        start = today + timedelta(days=rng.randint(-45, 45))
+        end = start + timedelta(days=rng.randint(0, 30))
+        resolution = None
+        if rng.random() < 0.1:
+            resolved = today - timedelta(days=rng.randint(0, 40))
+            resolution = resolved.strftime('%Y-%m-%dT10:00:00.000+0800')
+        tasks.append({
+            "Issue": key, "IssueType": "Sub-Manpower", "Summary": f"Sub {key}", "Status": "Open",
+            "Assignee": rng.choice(people),
+            "Target Start": start.strftime('%Y%m%d'),
+            "Target End": end.strftime('%Y%m%d'),
+            "Man-hour": rng.choice(['NA', 0, 0.1, 1, 2.5, 4, 8, 12.25, 16, 24, 40]),
+            "Parent": rng.choice(mains),
+            "resolutiondate": resolution
+        })
+    return tasks
+
+
+def task_to_raw(task, issue_id, updated):
+    """將 task dict 轉為 JIRA REST search 回傳的 issue JSON"""
+    def dashed(d):
+        return None if d == 'NA' else f"{d[:4]}-{d[4:6]}-{d[6:]}"
+
+    fields = {
+        'summary': task['Summary'],
+        'issuetype': {'name': task['IssueType']},
+        'status': {'name': task['Status']},
+        'assignee': None if task['Assignee'] == 'NA' else {'name': task['Assignee'], 'displayName': task['Assignee']},
+        'customfield_10109': dashed(task['Target Start']),
+        'customfield_10110': dashed(task['Target End']),
+        'customfield_12046': None if task['Man-hour'] in ('NA', 0) else task['Man-hour'],
+        'parent': None if task['Parent'] == 'NA' else {'key': task['Parent']},
+        'resolutiondate': task['resolutiondate'],
+        'updated': updated,
+    }
+    return {'id': str(issue_id), 'key': task['Issue'], 'self': f"/rest/api/2/issue/{issue_id}", 'fields': fields}
+
+
+def generate_raw_issues(n, project='BENCH', today=None, members=200, seed=0):
+    """Manpower/Sub-Manpower 階層的 JIRA issue JSON (含 customfield_10109/10110/12046、parent、resolutiondate)"""
+    tasks = generate_tasks(n, today=today, members=members, seed=seed)
+    updated = (today or date.today()).strftime('%Y-%m-%dT09:00:00.000+0800')
+    issues = []
+    for i, task in enumerate(tasks):
+        task = dict(task, Issue=task['Issue'].replace('MP-', f'{project}-'))
+        if task['Parent'] != 'NA':
+            task['Parent'] = task['Parent'].replace('MP-', f'{project}-')
+        issues.append(task_to_raw(task, 10000 + i, updated))
+    return issues
+
+
+def write_calendar_files(directory, years, seed=0):
+    """固定的假日資料 ({year}.json)，讓 benchmark 不需連網"""
+    import os
+    import json
+    for year in years:
+        with open(os.path.join(directory, f"{year}.json"), 'w', encoding='utf-8') as f:
+            json.dump(generate_calendar(year, seed=seed), f, ensure_ascii=False)